@@ -0,0 +1,89 @@
+"""
+Memory and per-rerun aggregation cost of object vs categorical role columns.
+
+Usage:
+    python -m benchmarks.bench_categorical [--rows 100000 1000000]
+
+"before" is the object-dtype frame pd.read_excel returns, aggregated the
+way the dashboard used to (re-stringifying columns with .astype(str));
+"after" is the frame from encode_categoricals() and the code-based
+helpers in survey_analysis (plus crosstab() below, which the dashboard
+used before its tables came from the count cube).
+"""
+
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.common import make_survey, timed
+
+import survey_analysis
+import survey_loader
+
+ROLES = [
+    "Are you an INCOSE member?",
+    "What would help you decide?",
+    "What would be valuable in 2026?",
+    "Domain",
+]
+
+
+def crosstab(rows, cols):
+    """
+    Cross-tabulate two categorical series straight from their codes, like
+    pd.crosstab() for observed answers.
+    """
+    row_codes = rows.cat.codes.to_numpy().astype(np.int64)
+    col_codes = cols.cat.codes.to_numpy()
+    n_cols = len(cols.cat.categories)
+    keep = (row_codes >= 0) & (col_codes >= 0)
+    table = np.bincount(
+        row_codes[keep] * n_cols + col_codes[keep],
+        minlength=len(rows.cat.categories) * n_cols,
+    ).reshape(-1, n_cols)
+    df = pd.DataFrame(
+        table,
+        index=pd.Index(rows.cat.categories, dtype=object, name=rows.name),
+        columns=pd.Index(cols.cat.categories, dtype=object, name=cols.name),
+    )
+    return df.loc[df.sum(axis=1) > 0, df.sum(axis=0) > 0]
+
+
+def aggregate_before(df):
+    member, decide, valuable, domain = ROLES
+    df[member].astype(str).str.contains("yes", case=False, na=False).sum()
+    df[decide].astype(str).str.contains("ASEP|CSEP", case=False, na=False).sum()
+    for col in (member, domain, valuable, domain, valuable):
+        df[col].astype(str).value_counts()
+    pd.crosstab(df[domain].astype(str), df[member].astype(str))
+
+
+def aggregate_after(df):
+    member, decide, valuable, domain = ROLES
+    survey_analysis.contains(df[member], "yes").sum()
+    survey_analysis.contains(df[decide], "ASEP|CSEP").sum()
+    for col in (member, domain, valuable, domain, valuable):
+        survey_analysis.value_counts(df[col])
+    crosstab(df[domain], df[member])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000])
+    args = parser.parse_args()
+
+    print(f"{'rows':>10} {'before MB':>10} {'after MB':>9} {'before s':>9} {'after s':>8}")
+    for n_rows in args.rows:
+        before = make_survey(n_rows, n_extra=0)[ROLES].astype(object)
+        after = survey_loader.encode_categoricals(before)
+
+        mem_before = before.memory_usage(deep=True).sum() / 1e6
+        mem_after = after.memory_usage(deep=True).sum() / 1e6
+        t_before, _ = timed(aggregate_before, before, repeat=3)
+        t_after, _ = timed(aggregate_after, after, repeat=3)
+        print(f"{n_rows:>10} {mem_before:>10.1f} {mem_after:>9.1f} {t_before:>9.3f} {t_after:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
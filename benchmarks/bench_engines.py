@@ -0,0 +1,48 @@
+"""
+Time every installed Excel engine on synthetic survey workbooks.
+
+Usage:
+    python -m benchmarks.bench_engines [--rows 1000 10000 100000] [--repeat 3]
+
+Each engine is timed twice per size: parsing every column
+(parse_workbook) and parsing only the role columns
+(parse_workbook_roles). Use the results to pick INCOSE_EXCEL_ENGINES.
+"""
+
+import argparse
+import os
+import tempfile
+
+from benchmarks.common import make_survey, timed
+
+import survey_loader
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--workdir", default=os.path.join(tempfile.gettempdir(), "incose_bench"))
+    args = parser.parse_args()
+
+    survey_loader.EXCEL_ENGINES = ["calamine", "openpyxl"]
+    engines = survey_loader.available_engines()
+    print("engines:", ", ".join(engines))
+    os.makedirs(args.workdir, exist_ok=True)
+
+    print(f"{'rows':>10} {'engine':>10} {'all cols (s)':>13} {'roles (s)':>10}")
+    for n_rows in args.rows:
+        path = os.path.join(args.workdir, f"survey_{n_rows}.xlsx")
+        if not os.path.exists(path):
+            make_survey(n_rows).to_excel(path, index=False)
+        with open(path, "rb") as f:
+            data = f.read()
+
+        for engine in engines:
+            full, _ = timed(survey_loader.parse_workbook, data, engine, repeat=args.repeat)
+            roles, _ = timed(survey_loader.parse_workbook_roles, data, engine, repeat=args.repeat)
+            print(f"{n_rows:>10} {engine:>10} {full:>13.3f} {roles:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
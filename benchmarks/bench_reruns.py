@@ -0,0 +1,125 @@
+"""
+Rerun latency of the dashboard: whole-script reruns vs fragment reruns.
+
+Usage:
+    pip install -r benchmarks/requirements.txt
+    python -m benchmarks.bench_reruns [--rows 10000 100000 1000000]
+
+The dashboard is driven with streamlit's AppTest on a stored survey
+opened from the recent-surveys picker. AppTest always reruns the whole
+script on a widget change, so fragment reruns are requested the way the
+browser does, by queueing the fragment's id; both timings include the
+same AppTest overhead.
+
+AppTest has no public API for fragment reruns, so fragment_ids() and
+rerun() rely on streamlit internals (the fragment storage, the closure
+of a fragment and the test script runner's RerunData). These were
+checked against STREAMLIT_VERSION only, and the benchmark refuses to run
+on any other release.
+"""
+
+import argparse
+import functools
+import os
+import tempfile
+from unittest import mock
+
+import streamlit
+
+from benchmarks.common import make_survey, timed
+
+# The release the internals below were checked against; keep in step with
+# benchmarks/requirements.txt.
+STREAMLIT_VERSION = "1.65"
+if streamlit.__version__.rsplit(".", 1)[0] != STREAMLIT_VERSION:
+    raise SystemExit(
+        f"bench_reruns needs streamlit {STREAMLIT_VERSION}.x, found {streamlit.__version__}"
+        " (pip install -r benchmarks/requirements.txt)"
+    )
+
+from streamlit.runtime.scriptrunner_utils.script_requests import RerunData
+from streamlit.testing.v1 import AppTest
+from streamlit.testing.v1 import local_script_runner
+
+import survey_loader
+
+DASHBOARD = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "incose_decision_dashboard.py",
+)
+
+
+def fragment_ids(at):
+    """
+    Map the function name of every registered fragment to its id.
+    """
+    ids = {}
+    for fragment_id, fragment in at._fragment_storage._fragments.items():
+        for cell in fragment.__closure__ or ():
+            if callable(cell.cell_contents) and hasattr(cell.cell_contents, "__name__"):
+                ids.setdefault(cell.cell_contents.__name__, fragment_id)
+    return ids
+
+
+def rerun(at, fragment_id=None):
+    """
+    Rerun *at*, either as a whole or only the fragment *fragment_id*.
+    """
+    if fragment_id is None:
+        return at.run()
+    queued = functools.partial(RerunData, fragment_id_queue=[fragment_id])
+    with mock.patch.object(local_script_runner, "RerunData", queued):
+        return at.run()
+
+
+def open_survey(key):
+    at = AppTest.from_file(DASHBOARD, default_timeout=600).run()
+    return at.multiselect[0].select(key).run()
+
+
+def toggle_filter(at, fragment_id=None):
+    domain = at.multiselect(key="filter_domain")
+    if domain.value:
+        domain.set_value([])
+    else:
+        domain.select(domain.options[0])
+    rerun(at, fragment_id)
+
+
+def click_summary(at, fragment_id=None):
+    at.button[0].click()
+    rerun(at, fragment_id)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--workdir", default=os.path.join(tempfile.gettempdir(), "incose_bench"))
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    os.makedirs(args.workdir, exist_ok=True)
+    survey_loader.CACHE_DIR = os.path.join(args.workdir, "sidecars")
+
+    print(f"{'rows':>10} {'action':>8} {'script (s)':>11} {'fragment (s)':>13} {'speedup':>8}")
+    for n_rows in args.rows:
+        path = os.path.join(args.workdir, f"survey_{n_rows}.csv")
+        if not os.path.exists(path):
+            make_survey(n_rows).to_csv(path, index=False)
+        key = survey_loader.hash_file(path)
+        survey_loader.load_surveys([(key, path, os.path.basename(path), None)])
+
+        for action, fn, fragment in [
+            ("filter", toggle_filter, "survey_view"),
+            ("summary", click_summary, "executive_summary"),
+        ]:
+            # A fragment rerun only sends the fragment's widgets to AppTest,
+            # so whole-script reruns are timed first, on a fresh session.
+            at = open_survey(key)
+            script, _ = timed(fn, at, repeat=args.repeat)
+            partial, _ = timed(fn, at, fragment_ids(at)[fragment], repeat=args.repeat)
+            print(f"{n_rows:>10} {action:>8} {script:>11.3f} {partial:>13.3f} {script / partial:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
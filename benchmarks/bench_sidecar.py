@@ -0,0 +1,54 @@
+"""
+Compare cold XLSX parsing with warm Arrow sidecar reloads.
+
+"read_excel" is the full parse of every column, the cold baseline;
+"roles" streams only the role columns (what an upload costs now);
+"arrow" reloads those columns from the sidecar. The speedup is over
+read_excel.
+
+Usage:
+    python -m benchmarks.bench_sidecar [--rows 10000 100000 1000000]
+
+Writing the 1M-row workbook takes several minutes; generated workbooks
+are kept in --workdir and reused on later runs.
+"""
+
+import argparse
+import os
+import tempfile
+
+from benchmarks.common import make_survey, timed
+
+import survey_loader
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--workdir", default=os.path.join(tempfile.gettempdir(), "incose_bench"))
+    args = parser.parse_args()
+
+    os.makedirs(args.workdir, exist_ok=True)
+    survey_loader.CACHE_DIR = os.path.join(args.workdir, "sidecars")
+
+    print(
+        f"{'rows':>10} {'read_excel (s)':>15} {'roles (s)':>10} {'arrow (s)':>10} {'speedup':>9}"
+    )
+    for n_rows in args.rows:
+        path = os.path.join(args.workdir, f"survey_{n_rows}.xlsx")
+        if not os.path.exists(path):
+            make_survey(n_rows).to_excel(path, index=False)
+        with open(path, "rb") as f:
+            data = f.read()
+        key = survey_loader.content_hash(data)
+
+        cold, _ = timed(survey_loader.parse_workbook, data)
+        roles, df = timed(survey_loader.parse_workbook_roles, data)
+        survey_loader.write_sidecar(key, survey_loader.encode_categoricals(df))
+        warm, _ = timed(survey_loader.read_sidecar, key, repeat=3)
+
+        print(f"{n_rows:>10} {cold:>15.3f} {roles:>10.3f} {warm:>10.4f} {cold / warm:>8.0f}x")
+
+
+if __name__ == "__main__":
+    main()
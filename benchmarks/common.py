@@ -0,0 +1,47 @@
+"""
+Shared helpers for the loader benchmarks: synthetic surveys and timing.
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+# Make the repository modules importable when run as `python -m benchmarks.x`.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+MEMBERSHIP = ["Yes", "No", "Exploring", "Will decide after the event"]
+DECIDE = ["ASEP guidance", "CSEP roadmap", "Mentorship", "Employer support", None]
+VALUABLE = ["Certification workshops", "Mentoring", "Events", "Webinars", "Case studies"]
+DOMAINS = ["Healthcare", "Automotive", "Aerospace", "Defence", "Rail", "Energy"]
+
+
+def make_survey(n_rows, n_extra=20, seed=0):
+    """
+    Build a survey-shaped frame with the four role columns plus filler.
+    """
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "Timestamp": pd.Timestamp("2026-01-01") + pd.to_timedelta(np.arange(n_rows), unit="s"),
+        "Are you an INCOSE member?": rng.choice(MEMBERSHIP, n_rows),
+        "What would help you decide?": rng.choice(np.array(DECIDE, dtype=object), n_rows),
+        "What would be valuable in 2026?": rng.choice(VALUABLE, n_rows),
+        "Domain": rng.choice(DOMAINS, n_rows),
+    })
+    for i in range(n_extra):
+        df[f"Question {i + 1}"] = rng.integers(1, 6, n_rows)
+    return df
+
+
+def timed(fn, *args, repeat=1):
+    """
+    Return (best wall-clock seconds, result) over *repeat* calls.
+    """
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
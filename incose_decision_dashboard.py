@@ -1,278 +1,692 @@
 
+from datetime import datetime
+
 import streamlit as st
 import pandas as pd
 
-# =====================================================
-# PAGE CONFIG
-# =====================================================
-st.set_page_config(
-    page_title="INCOSE India – Decision Support System",
-    layout="wide"
+from survey_analysis import (
+    ComputeGraph,
+    CountCube,
+    counts_series,
+    filter_rows,
+    multi_select_options,
+    row_indexes,
+    value_counts,
+)
+from survey_loader import (
+    ARCHIVE_TYPES,
+    DERIVED_CACHE,
+    PARSE_CACHE,
+    RAW_CACHE,
+    REGION_COL,
+    SHEETS_CACHE,
+    SURVEY_TYPES,
+    WAVE_COL,
+    WATCH_DIR,
+    WATCH_INTERVAL,
+    ArchiveMember,
+    archive_format,
+    archive_members,
+    combine_surveys,
+    detect_role_columns,
+    detect_roles,
+    folder_watcher,
+    is_stored,
+    label_waves,
+    load_survey,
+    recent_surveys,
+    release_upload,
+    response_dataset,
+    selection_key,
+    spool_upload,
+    start_load,
+    survey_format,
+    workbook_sheets,
 )
 
-st.title("INCOSE India – Survey Decision Support System")
-st.caption("Outcomes • Insights • Risks • Strategic Direction")
 
-# =====================================================
-# FILE UPLOAD
-# =====================================================
-file = st.file_uploader(
-    "Upload INCOSE India Survey Excel File",
-    type=["xlsx"]
-)
+def main():
+    """
+    Draw the page: load the selected surveys, then show their sections.
+    """
+    # =====================================================
+    # PAGE CONFIG
+    # =====================================================
+    st.set_page_config(
+        page_title="INCOSE India – Decision Support System",
+        layout="wide"
+    )
+
+    st.title("INCOSE India – Survey Decision Support System")
+    st.caption("Outcomes • Insights • Risks • Strategic Direction")
+
+    # =====================================================
+    # FILE UPLOAD
+    # =====================================================
+    upload_col, recent_col = st.columns([2, 1])
+
+    with upload_col:
+        files = st.file_uploader(
+            "Upload INCOSE India Survey Files (Excel, CSV, TSV or JSONL, "
+            "optionally in .zip / .gz archives) – one per survey wave",
+            type=SURVEY_TYPES + ARCHIVE_TYPES,
+            accept_multiple_files=True
+        )
+
+    # Previously parsed surveys open straight from the on-disk store.
+    with recent_col:
+        recent = {meta["key"]: meta for meta in recent_surveys()}
+        picked = st.multiselect(
+            "Or open recent surveys",
+            list(recent),
+            format_func=lambda key: (
+                f"{recent[key]['name']} – {recent[key]['rows']:,} rows "
+                f"({datetime.fromtimestamp(recent[key]['stored']):%d %b %Y})"
+            )
+        )
+
+    # Exports of a survey that is still open can be collected in a dataset:
+    # each upload only adds the responses the dataset has not seen yet.
+    with recent_col:
+        dataset_name = st.text_input(
+            "Append uploads to dataset",
+            placeholder="e.g. INCOSE India 2026",
+            help="Only new responses of each upload are added, matched by "
+                 "respondent ID or timestamp where the export has them."
+        ).strip()
+    dataset = None
+
+    # Surveys dropped into the watched folder are parsed in the background;
+    # only those already parsed are listed, so the page never waits on them.
+    watcher = folder_watcher()
+    watched = []
+    if watcher is not None:
+        with recent_col:
+            if st.toggle(f"Include surveys from {WATCH_DIR}", value=True):
+                watched = watcher.uploads()
+                if watcher.error is not None:
+                    st.warning(f"Watched folder could not be read: {watcher.error}")
+                for message in watcher.errors:
+                    st.warning(f"Could not parse {message}")
+
+        # Rerun the page when the watcher has finished parsing new files.
+        @st.fragment(run_every=WATCH_INTERVAL)
+        def watch_for_updates():
+            seen = st.session_state.setdefault("watch_version", watcher.version)
+            if watcher.version != seen:
+                st.session_state.watch_version = watcher.version
+                st.rerun()
+
+        watch_for_updates()
+
+    # Initialize df defensively
+    df = None
+
+    if not files and not picked and not watched:
+        st.info("Please upload the INCOSE India survey file to proceed.")
+        st.stop()
+
+    # =====================================================
+    # LOAD DATA
+    # =====================================================
+    # Uploads are spooled to temp files and parsed from disk, and only when
+    # their parsed result is not cached already. Each upload is hashed once
+    # per session; reruns reuse its key without touching the bytes.
+    upload_keys = st.session_state.setdefault("upload_keys", {})
+    spooled = {}
+
+    def upload_source(file):
+        """
+        Return the path of *file* spooled to disk, spooling it on first use.
+        """
+        if file.file_id not in spooled:
+            spooled[file.file_id] = spool_upload(file, file.name)[1]
+        return spooled[file.file_id]
+
+    try:
+        uploads = []
+        upload_files = {}
+        for file in files:
+            data_key = upload_keys.get(file.file_id)
+            if data_key is None:
+                data_key, spooled[file.file_id] = spool_upload(file, file.name)
+                upload_keys[file.file_id] = data_key
+
+            # Every survey file inside an archive is loaded as its own wave,
+            # streamed out of the archive (see ArchiveMember).
+            if archive_format(file.name):
+                members = SHEETS_CACHE.get(data_key)
+                if members is None:
+                    members = SHEETS_CACHE.get_or_parse(
+                        data_key, archive_members, upload_source(file), file.name
+                    )
+                for member, member_name in members:
+                    load_key = selection_key(data_key, [member_name])
+                    source = None
+                    if load_key not in PARSE_CACHE and not is_stored(load_key):
+                        source = ArchiveMember(upload_source(file), member)
+                    uploads.append((load_key, source, member_name, None))
+                    upload_files[load_key] = (file, member)
+                continue
+
+            # Workbooks with one sheet per region can be loaded as a whole;
+            # the selected sheets are parsed in parallel.
+            sheets = None
+            if survey_format(file.name) == "xlsx":
+                all_sheets = SHEETS_CACHE.get(data_key)
+                if all_sheets is None:
+                    all_sheets = SHEETS_CACHE.get_or_parse(
+                        data_key, workbook_sheets, upload_source(file)
+                    )
+                if len(all_sheets) > 1:
+                    sheets = st.multiselect(
+                        f"Sheets / regions to include – {file.name}",
+                        all_sheets,
+                        default=all_sheets,
+                        key=f"sheets_{file.file_id}"
+                    )
+                    if not sheets:
+                        st.info("Select at least one sheet to proceed.")
+                        st.stop()
+
+            load_key = selection_key(data_key, sheets)
+            source = None
+            if load_key not in PARSE_CACHE and not is_stored(load_key):
+                source = upload_source(file)
+            uploads.append((load_key, source, file.name, sheets))
+            upload_files[load_key] = (file, None)
+
+        # Stored surveys need no upload: they load from their sidecar.
+        for key in picked:
+            if key not in upload_files:
+                uploads.append((key, None, recent[key]["name"], recent[key]["sheets"]))
+
+        # Watched files are read in place and never deleted by the job.
+        loading = {key for key, _, _, _ in uploads}
+        uploads.extend(upload for upload in watched if upload[0] not in loading)
+
+        # Only the role columns are materialized; reruns and previously seen
+        # uploads are served from the parse cache or memory-mapped from their
+        # Arrow sidecar, so adding a new wave only parses the new file.
+        # Parsing runs in the background while a preview is shown.
+        # The job deletes the spooled files as soon as they are parsed.
+        job = start_load(uploads, owned_paths=list(spooled.values()))
+        spooled.clear()
+        if not job.done():
+            progress_slot = st.empty()
+            preview_slot = st.empty()
+            while not job.wait(timeout=0.25):
+                progress_slot.info(
+                    f"Parsing survey… {job.rows_read():,} rows read "
+                    f"({job.rows_per_second():,.0f} rows/s)"
+                )
+                if job.preview is not None:
+                    preview_slot.dataframe(job.preview, use_container_width=True)
+            progress_slot.empty()
+            preview_slot.empty()
+        loaded = job.result()
+
+        # Each uploaded file is one survey wave, named after the file.
+        wave_labels = label_waves([name for _, _, name, _ in uploads])
+        if dataset_name:
+            dataset = response_dataset(dataset_name)
+            appended = sum(
+                dataset.append(key, frame)
+                for (key, _, _, _), (frame, _) in zip(uploads, loaded)
+            )
+            df_key = dataset.key
+            df = PARSE_CACHE.get_or_parse(df_key, dataset.frame)
+        elif len(loaded) == 1:
+            df_key = uploads[0][0]
+            df = loaded[0][0]
+        else:
+            df_key = selection_key("waves", [key for key, _, _, _ in uploads])
+            df = PARSE_CACHE.get_or_parse(
+                df_key,
+                combine_surveys,
+                [frame for frame, _ in loaded],
+                wave_labels,
+                WAVE_COL,
+            )
+    except Exception as e:
+        st.error("Failed to read the survey file.")
+        st.exception(e)
+        st.stop()
+    finally:
+        for path in spooled.values():
+            release_upload(path)
+
+    # Sections pull what they show from the graph of computations below
+    # (see COMPUTATION GRAPH).
+    graph = ComputeGraph(
+        DERIVED_CACHE, memo=st.session_state.setdefault("graph_memo", {})
+    )
+    graph.set("parsed", df, df_key)
+    graph.set("dataset", dataset, None if dataset is None else dataset.key)
+    graph.add("roles", survey_roles, ["parsed"])
+    # "Select all that apply" answers are split into option indicators once
+    # per loaded survey; filters select respondents from them.
+    graph.add("options", multi_select_options, ["parsed", "roles"], shared=True)
+    graph.add("indexes", filter_indexes, ["parsed", "roles", "options"], shared=True)
+    graph.add(
+        "survey_cube", survey_cube, ["parsed", "roles", "options", "dataset"],
+        shared=True, lazy=True,
+    )
+    graph.add("filtered", filtered_view, ["parsed", "options", "indexes", "selections"])
+    graph.add(
+        "cube", filtered_cube, ["survey_cube", "filtered", "roles", "selections"], lazy=True
+    )
+    graph.add("counts", filtered_counts, ["cube", "dataset", "selections"], lazy=True)
+    graph.add("insights", key_insights, ["counts"])
+    graph.add("risks", risks_and_opportunities, ["counts", "insights"])
+    graph.add("summary", summary_text, ["counts", "insights"])
+
+    # =====================================================
+    # SAFE COLUMN DETECTION
+    # =====================================================
+    roles = detect_roles(df.columns)
+
+    membership_col  = roles["membership"]
+    confidence_col  = roles["confidence"]
+    expectation_col = roles["expectation"]
+    domain_col      = roles["domain"]
+
+    missing = []
+    if membership_col is None:
+        missing.append("Membership")
+    if confidence_col is None:
+        missing.append("Decision / Confidence")
+    if expectation_col is None:
+        missing.append("Expectations")
+    if domain_col is None:
+        missing.append("Domain")
+
+    if missing:
+        st.error(
+            "Required columns not found:\n\n" +
+            "\n".join(f"- {m}" for m in missing)
+        )
+        st.stop()
+
+    if df is None or df.empty:
+        st.error("The uploaded file contains no data.")
+        st.stop()
+
+    st.success("Survey data loaded successfully")
+    st.caption(" · ".join(
+        f"{name}: **{info['engine']}** in {info['seconds']:.2f}s"
+        for (_, _, name, _), (_, info) in zip(uploads, loaded)
+    ))
+
+    if dataset is not None:
+        st.caption(
+            f"Dataset {dataset.name}: {dataset.rows:,} responses "
+            f"({appended:,} new in these uploads)"
+        )
+
+    cache_stats = PARSE_CACHE.stats()
+    st.caption(
+        f"Parse cache: {cache_stats['parses']} parses run · "
+        f"{cache_stats['hits']} cache hits · "
+        f"{cache_stats['shared']} parses saved by sharing in-flight work"
+    )
 
-# Initialize df defensively
-df = None
+    survey_view(graph, dataset, uploads, upload_files, wave_labels)
 
-if file is None:
-    st.info("Please upload the INCOSE India survey Excel file to proceed.")
-    st.stop()
 
 # =====================================================
-# LOAD DATA
+# COMPUTATION GRAPH
 # =====================================================
-try:
-    # Explicit engine for .xlsx
-    df = pd.read_excel(file, engine="openpyxl")
-except Exception as e:
-    st.error("Failed to read the Excel file.")
-    st.exception(e)
-    st.stop()
-
-if df is None or df.empty:
-    st.error("The uploaded file contains no data.")
-    st.stop()
+# Sections pull what they show from a graph of memoized computations:
+# parsed frame → roles → filtered view → counts → insights → risks →
+# summary. A node only runs when a section asks for it and one of its
+# inputs changed since it last ran; the per-survey structures (options,
+# row indexes, count cube) are shared by every session.
+filter_labels = {
+    "domain": "Domain",
+    "membership": "Membership Status",
+    "confidence": "Decision Factors",
+    "expectation": "Expectations",
+}
+
+
+def survey_roles(df):
+    # Decision and expectation answers may span several questions.
+    return detect_role_columns(df.columns)
+
+
+def filter_indexes(df, role_columns, options):
+    # Rows per answer are indexed (as positions and bitmaps) once per
+    # loaded survey, so any combination of filters is a few bitwise
+    # operations and one gather rather than a comparison over every row.
+    return row_indexes(
+        df, {role: role_columns[role] for role in filter_labels}, options
+    )
 
-# =====================================================
-# CLEAN COLUMN NAMES
-# =====================================================
-df.columns = (
-    df.columns.astype(str)
-      .str.strip()
-      .str.replace(r"\s+", " ", regex=True)
-)
 
-st.success("Survey data loaded successfully")
+def survey_cube(df, role_columns, options, dataset):
+    # A dataset keeps its cube current as responses are appended, rather
+    # than recounting every stored row after each upload.
+    if dataset() is not None:
+        return dataset().cube()
+    return CountCube(df(), role_columns(), options())
 
-# =====================================================
-# SAFE COLUMN DETECTION
-# =====================================================
-def find_column(keywords):
+
+def filtered_view(df, options, indexes, selections):
     """
-    Return the first column whose lowercased name contains *all* keywords.
+    Return the selected rows of *df* and their option matrices.
     """
-    for col in df.columns:
-        col_lower = col.lower()
-        if all(k in col_lower for k in keywords):
-            return col
-    return None
-
-membership_col  = find_column(["incose", "member"])   # e.g., "Are you an INCOSE member?"
-confidence_col  = find_column(["decide"])             # e.g., "What would help you decide?"
-expectation_col = find_column(["valuable"])           # e.g., "What would be valuable in 2026?"
-domain_col      = find_column(["domain"])             # e.g., "Domain"
-
-missing = []
-if membership_col is None:
-    missing.append("Membership")
-if confidence_col is None:
-    missing.append("Decision / Confidence")
-if expectation_col is None:
-    missing.append("Expectations")
-if domain_col is None:
-    missing.append("Domain")
-
-if missing:
-    st.error(
-        "Required columns not found:\n\n" +
-        "\n".join(f"- {m}" for m in missing)
+    positions = filter_rows(indexes, selections)
+    if positions is None:
+        return df, options
+    return (
+        df.take(positions),
+        {role: matrix.take(positions) for role, matrix in options.items()},
     )
-    st.stop()
 
-# =====================================================
-# DOMAIN FILTER
-# =====================================================
-st.subheader("🔍 Filter by Domain")
 
-domains = ["All"] + sorted(pd.Series(df[domain_col]).dropna().astype(str).unique().tolist())
-selected_domain = st.selectbox("Select Domain", domains)
+def filtered_cube(cube, filtered, role_columns, selections):
+    # The survey's cube does not keep individual decision factors or
+    # expectations, so filtering on those counts the matching rows into a
+    # cube of their own; domain and membership filters just slice it.
+    if selections()["confidence"] or selections()["expectation"]:
+        df, options = filtered()
+        return CountCube(df, role_columns(), options)
+    return cube().slice(selections())
 
-if selected_domain != "All":
-    df = df[df[domain_col].astype(str) == selected_domain]
 
-if df.empty:
-    st.warning("No responses available for the selected domain.")
-    st.stop()
+def filtered_counts(cube, dataset, selections):
+    # A dataset keeps its totals up to date as responses are appended.
+    if dataset() is not None and dataset().counts is not None and not any(selections().values()):
+        return dataset().counts
+    return cube().counts()
 
-# =====================================================
-# KEY OUTCOMES
-# =====================================================
-st.header("📌 Key Outcomes")
 
-col1, col2, col3 = st.columns(3)
+def key_insights(counts):
+    domain_counts = counts_series(counts["domain"])
+    expect_counts = counts_series(counts["expectation"])
+    return {
+        "domain_counts": domain_counts,
+        "top_domain": domain_counts.idxmax() if not domain_counts.empty else "N/A",
+        "top_expectation": expect_counts.idxmax() if not expect_counts.empty else "N/A",
+    }
 
-col1.metric("Total Responses", len(df))
 
-col2.metric(
-    "Existing INCOSE Members",
-    df[membership_col].astype(str)
-      .str.contains("yes", case=False, na=False).sum()
-)
+def risks_and_opportunities(counts, insights):
+    """
+    Return (risks, opportunities) as lists of sentences.
+    """
+    risks = []
+    opportunities = []
 
-col3.metric(
-    "Need ASEP / CSEP Guidance",
-    df[confidence_col].astype(str)
-      .str.contains("ASEP|CSEP", case=False, na=False).sum()
-)
+    if counts["asep"] > 10:
+        risks.append(
+            "Lack of structured ASEP/CSEP guidance may delay membership conversion"
+        )
 
-# =====================================================
-# DISTRIBUTIONS
-# =====================================================
-st.header("📊 Survey Distributions")
+    if counts["exploring"] > 8:
+        opportunities.append(
+            "High near-term conversion potential with targeted follow-up"
+        )
 
-c1, c2 = st.columns(2)
+    if "Healthcare" in insights["domain_counts"].head(3).index.tolist():
+        opportunities.append(
+            "Healthcare domain shows strong potential for focused INCOSE initiatives"
+        )
 
-with c1:
-    st.subheader("Membership Status")
-    st.bar_chart(
-        df[membership_col].astype(str).value_counts(),
-        use_container_width=True
-    )
+    return risks, opportunities
 
-with c2:
-    st.subheader("Domain Representation")
-    st.bar_chart(
-        df[domain_col].astype(str).value_counts(),
-        use_container_width=True
-    )
 
-st.subheader("What Members Expect from INCOSE (2026)")
-st.bar_chart(
-    df[expectation_col].astype(str).value_counts(),
-    use_container_width=True
-)
+def summary_text(counts, insights):
+    return f"""
+Executive Summary – INCOSE India Survey
 
-# =====================================================
-# RELATIONSHIPS
-# =====================================================
-st.header("🔗 Domain vs Membership Status")
+Total Responses: {counts["responses"]}
+Most Represented Domain: {insights["top_domain"]}
+Primary Member Expectation (2026): {insights["top_expectation"]}
 
-relationship_df = pd.crosstab(
-    df[domain_col].astype(str),
-    df[membership_col].astype(str)
-)
+Key Findings:
+- Strong interest exists, but clarity gaps slow conversion
+- Certification guidance is the strongest decision driver
+- Domain-specific engagement improves perceived value
 
-st.dataframe(relationship_df, use_container_width=True)
+Strategic Direction:
+INCOSE India should shift toward certification-led,
+domain-focused professional enablement.
+"""
 
 # =====================================================
-# KEY INSIGHTS
+# EXECUTIVE SUMMARY
 # =====================================================
-st.header("💡 Key Insights")
+# Generating the summary reruns only this fragment, from the counts of
+# the last filter run; the summary is only computed once asked for.
+@st.fragment
+def executive_summary(graph):
+    st.header("📄 Executive Summary")
 
-domain_counts = df[domain_col].astype(str).value_counts()
-expect_counts = df[expectation_col].astype(str).value_counts()
+    if st.button("Generate Executive Summary"):
+        st.text_area("Executive Summary Output", graph.get("summary"), height=300)
 
-top_domain = domain_counts.idxmax() if not domain_counts.empty else "N/A"
-top_expectation = expect_counts.idxmax() if not expect_counts.empty else "N/A"
-
-st.markdown(f"""
-### Insight Summary
-- **Most represented domain:** {top_domain}
-- **Top expectation for 2026:** {top_expectation}
-- Most non-members are seeking **clarity, not awareness**
-- **Certification pathway guidance** is the strongest conversion lever
-""")
 
 # =====================================================
-# RISKS & 🟢 OPPORTUNITIES
+# RAW DATA
 # =====================================================
-st.header("⚠️ Risks & 🟢 Opportunities")
+# Showing every survey column reruns only this fragment.
+@st.fragment
+def raw_data(graph, dataset, uploads, upload_files, wave_labels):
+    df = graph.get("filtered")[0]
+    with st.expander("📂 View Raw Data"):
+        # The full-width frame is only parsed once someone asks for it.
+        if dataset is not None:
+            st.caption("Datasets only keep the survey's role columns.")
+            st.dataframe(df, use_container_width=True)
+        elif any(key not in upload_files for key, _, _, _ in uploads):
+            st.caption("All survey columns are only available for uploaded files.")
+            st.dataframe(df, use_container_width=True)
+        elif st.checkbox("Show all survey columns"):
+            raw_frames = []
+            for key, _, name, sheets in uploads:
+                raw = RAW_CACHE.get(key)
+                if raw is None:
+                    file, member = upload_files[key]
+                    path = spool_upload(file, file.name)[1]
+                    source = path if archive_format(file.name) is None else ArchiveMember(path, member)
+                    try:
+                        raw = RAW_CACHE.get_or_parse(key, load_survey, source, name, sheets)
+                    finally:
+                        release_upload(path)
+                raw_frames.append(raw[0])
+            if len(raw_frames) == 1:
+                raw_df = raw_frames[0]
+            else:
+                raw_df = pd.concat(
+                    [frame.assign(**{WAVE_COL: label})
+                     for frame, label in zip(raw_frames, wave_labels)],
+                    ignore_index=True
+                )
+            st.dataframe(raw_df.loc[df.index], use_container_width=True)
+        else:
+            st.dataframe(df, use_container_width=True)
 
-risks = []
-opportunities = []
-
-asep_count = df[confidence_col].astype(str).str.contains(
-    "ASEP|CSEP", case=False, na=False
-).sum()
-
-if asep_count > 10:
-    risks.append(
-        "Lack of structured ASEP/CSEP guidance may delay membership conversion"
-    )
-
-if df[membership_col].astype(str).str.contains(
-    "exploring|decide", case=False, na=False
-).sum() > 8:
-    opportunities.append(
-        "High near-term conversion potential with targeted follow-up"
-    )
-
-if "Healthcare" in domain_counts.head(3).index.tolist():
-    opportunities.append(
-        "Healthcare domain shows strong potential for focused INCOSE initiatives"
-    )
-
-col_risk, col_opp = st.columns(2)
-
-with col_risk:
-    st.subheader("🔴 Risks")
-    if risks:
-        for r in risks:
-            st.write(f"- {r}")
-    else:
-        st.write("No critical risks identified.")
-
-with col_opp:
-    st.subheader("🟢 Opportunities")
-    if opportunities:
-        for o in opportunities:
-            st.write(f"- {o}")
-    else:
-        st.write("No major opportunities identified.")
 
 # =====================================================
-# STRATEGIC RECOMMENDATIONS
+# FILTERED VIEW
 # =====================================================
-st.header("🧭 Strategic Recommendations")
+# Changing a filter reruns only the sections below, which all depend on
+# the filtered responses; loading surveys above reruns the whole page.
+@st.fragment
+def survey_view(graph, dataset, uploads, upload_files, wave_labels):
+    graph.timings.clear()
+
+    # =====================================================
+    # FILTERS
+    # =====================================================
+    st.subheader("🔍 Filter Responses")
+
+    indexes = graph.get("indexes")
+    selections = {}
+    for filter_col, (role, label) in zip(st.columns(len(filter_labels)), filter_labels.items()):
+        with filter_col:
+            selections[role] = st.multiselect(label, indexes[role].answers(), key=f"filter_{role}")
+    graph.set(
+        "selections",
+        selections,
+        tuple((role, tuple(answers)) for role, answers in selections.items()),
+    )
 
-recommendations = [
-    "Launch a structured ASEP/CSEP guidance program with clear timelines",
-    "Create domain-focused engagement tracks starting with Healthcare",
-    "Introduce mentorship-driven certification enablement",
-    "Position INCOSE membership as a career credential",
-    "Develop employer-facing material highlighting certification ROI",
-    "Repeat this survey annually to track engagement trends"
-]
+    df = graph.get("filtered")[0]
+    if df.empty:
+        st.warning("No responses match the selected filters.")
+        return
 
-for i, rec in enumerate(recommendations, 1):
-    st.write(f"{i}. {rec}")
+    # Every count below comes from a cube of respondent counts built once
+    # per loaded survey (see filtered_cube()).
+    cube = graph.get("cube")
+    counts = graph.get("counts")
 
-# =====================================================
-# EXECUTIVE SUMMARY
-# =====================================================
-st.header("📄 Executive Summary")
+    # =====================================================
+    # KEY OUTCOMES
+    # =====================================================
+    st.header("📌 Key Outcomes")
 
-if st.button("Generate Executive Summary"):
-    summary = f"""
-Executive Summary – INCOSE India Survey
+    col1, col2, col3 = st.columns(3)
 
-Total Responses: {len(df)}
-Most Represented Domain: {top_domain}
-Primary Member Expectation (2026): {top_expectation}
+    col1.metric("Total Responses", counts["responses"])
 
-Key Findings:
-- Strong interest exists, but clarity gaps slow conversion
-- Certification guidance is the strongest decision driver
-- Domain-specific engagement improves perceived value
+    col2.metric(
+        "Existing INCOSE Members",
+        counts["members"]
+    )
 
-Strategic Direction:
-INCOSE India should shift toward certification-led,
-domain-focused professional enablement.
-"""
-    st.text_area("Executive Summary Output", summary, height=300)
+    col3.metric(
+        "Need ASEP / CSEP Guidance",
+        counts["asep"]
+    )
 
-# =====================================================
-# RAW DATA
-# =====================================================
-with st.expander("📂 View Raw Data"):
-    st.dataframe(df, use_container_width=True)
+    # =====================================================
+    # DISTRIBUTIONS
+    # =====================================================
+    st.header("📊 Survey Distributions")
+
+    c1, c2 = st.columns(2)
+
+    with c1:
+        st.subheader("Membership Status")
+        st.bar_chart(
+            counts_series(counts["membership"]),
+            use_container_width=True
+        )
+
+    with c2:
+        st.subheader("Domain Representation")
+        st.bar_chart(
+            counts_series(counts["domain"]),
+            use_container_width=True
+        )
+
+    if WAVE_COL in df.columns:
+        st.subheader("Responses by Survey Wave")
+        st.bar_chart(
+            df[WAVE_COL].value_counts(sort=False),
+            use_container_width=True
+        )
+
+    if REGION_COL in df.columns:
+        st.subheader("Regional Representation")
+        st.bar_chart(
+            value_counts(df[REGION_COL]),
+            use_container_width=True
+        )
+
+    st.subheader("What Members Expect from INCOSE (2026)")
+    st.bar_chart(
+        counts_series(counts["expectation"]),
+        use_container_width=True
+    )
+
+    # =====================================================
+    # RELATIONSHIPS
+    # =====================================================
+    st.header("🔗 Domain vs Membership Status")
+
+    relationship_df = cube.table("membership")
+
+    st.dataframe(relationship_df, use_container_width=True)
+
+    st.header("🔗 Domain vs Expectations")
+
+    # Respondents per domain and expected offering; multi-select answers are
+    # counted once per selected option.
+    st.dataframe(cube.table("expectation"), use_container_width=True)
+
+    # =====================================================
+    # KEY INSIGHTS
+    # =====================================================
+    st.header("💡 Key Insights")
+
+    insights = graph.get("insights")
+
+    st.markdown(f"""
+    ### Insight Summary
+    - **Most represented domain:** {insights["top_domain"]}
+    - **Top expectation for 2026:** {insights["top_expectation"]}
+    - Most non-members are seeking **clarity, not awareness**
+    - **Certification pathway guidance** is the strongest conversion lever
+    """)
+
+    # =====================================================
+    # RISKS & 🟢 OPPORTUNITIES
+    # =====================================================
+    st.header("⚠️ Risks & 🟢 Opportunities")
+
+    risks, opportunities = graph.get("risks")
+
+    col_risk, col_opp = st.columns(2)
+
+    with col_risk:
+        st.subheader("🔴 Risks")
+        if risks:
+            for r in risks:
+                st.write(f"- {r}")
+        else:
+            st.write("No critical risks identified.")
+
+    with col_opp:
+        st.subheader("🟢 Opportunities")
+        if opportunities:
+            for o in opportunities:
+                st.write(f"- {o}")
+        else:
+            st.write("No major opportunities identified.")
+
+    # =====================================================
+    # STRATEGIC RECOMMENDATIONS
+    # =====================================================
+    st.header("🧭 Strategic Recommendations")
+
+    recommendations = [
+        "Launch a structured ASEP/CSEP guidance program with clear timelines",
+        "Create domain-focused engagement tracks starting with Healthcare",
+        "Introduce mentorship-driven certification enablement",
+        "Position INCOSE membership as a career credential",
+        "Develop employer-facing material highlighting certification ROI",
+        "Repeat this survey annually to track engagement trends"
+    ]
+
+    for i, rec in enumerate(recommendations, 1):
+        st.write(f"{i}. {rec}")
+
+    executive_summary(graph)
+    raw_data(graph, dataset, uploads, upload_files, wave_labels)
+
+    st.caption("Computed this run: " + " · ".join(
+        f"{name} {'memoized' if seconds is None else f'{seconds * 1000:.1f} ms'}"
+        for name, seconds in graph.timings.items()
+    ))
+
+
+# Streamlit runs this script as __main__. Parse workers import it as
+# __mp_main__ when they start (see survey_loader.worker_context()), and
+# must not draw the page.
+if __name__ == "__main__":
+    main()
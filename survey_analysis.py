@@ -0,0 +1,661 @@
+"""
+Aggregation helpers for the INCOSE India dashboard.
+
+Role columns arrive as pandas Categoricals (see survey_loader), so the
+helpers here work on category codes rather than on per-row strings. A
+role answered over several questions is passed as a DataFrame of its
+columns; their codes are stacked and handled in one pass.
+"""
+
+import copy
+import functools
+import time
+
+import numpy as np
+import pandas as pd
+
+
+# =====================================================
+# STACKED CODES
+# =====================================================
+def stacked_codes(data):
+    """
+    Return (codes, categories) for a categorical Series or DataFrame.
+
+    *codes* is a rows x columns int array over the shared *categories*;
+    columns with different categories are remapped onto their sorted
+    union first (per category, not per row). Missing answers are -1.
+    """
+    if isinstance(data, pd.Series):
+        return data.cat.codes.to_numpy()[:, None], data.cat.categories
+    columns = [data.iloc[:, i] for i in range(data.shape[1])]
+    categories = columns[0].cat.categories
+    if any(not col.cat.categories.equals(categories) for col in columns[1:]):
+        categories = pd.Index(
+            sorted(set().union(*(col.cat.categories for col in columns))), dtype=object
+        )
+    codes = np.empty((len(data), len(columns)), dtype=np.int64)
+    for j, col in enumerate(columns):
+        remap = np.append(categories.get_indexer(col.cat.categories), -1)
+        codes[:, j] = remap[col.cat.codes.to_numpy()]
+    return codes, categories
+
+
+def _single(data):
+    # A one-column frame is handled exactly like its Series.
+    if isinstance(data, pd.DataFrame) and data.shape[1] == 1:
+        return data.iloc[:, 0]
+    return data
+
+
+# =====================================================
+# COUNTS
+# =====================================================
+def value_counts(data):
+    """
+    Count responses per answer, most frequent first.
+
+    Categorical counts include every category, so answers with no
+    responses (e.g. outside the selected domain) are dropped. For a
+    DataFrame, answers are counted across all of its columns, once per
+    respondent however many of the columns give them (like CountCube).
+    """
+    data = _single(data)
+    if isinstance(data, pd.Series):
+        counts = data.value_counts()
+        return counts[counts > 0]
+    _, codes, categories = _answer_pairs(data)
+    counts = pd.Series(
+        np.bincount(codes, minlength=len(categories)),
+        index=pd.Index(categories, dtype=object),
+    )
+    counts = counts.sort_values(ascending=False, kind="stable")
+    return counts[counts > 0]
+
+
+# =====================================================
+# KEYWORD MATCHING
+# =====================================================
+def contains(data, pattern, case=False):
+    """
+    Boolean array: does each answer of a categorical *data* match the
+    regex *pattern*? For a DataFrame: does any of a row's answers match?
+
+    The regex runs once per distinct answer and the result is broadcast
+    back to rows through the category codes, so the regex work is
+    O(unique answers) instead of O(rows). Missing answers never match.
+    """
+    codes, categories = stacked_codes(_single(data))
+    hits = (
+        pd.Series(categories, dtype=object)
+          .str.contains(pattern, case=case, regex=True)
+          .to_numpy(dtype=bool)
+    )
+    # Code -1 (missing) picks the trailing False.
+    return np.append(hits, False)[codes].any(axis=1)
+
+
+# =====================================================
+# ROW INDEXES
+# =====================================================
+def _answer_pairs(data):
+    """
+    Return (rows, codes, categories) with one entry per distinct answer
+    of each row, in row order, for a categorical Series or DataFrame or
+    an OptionMatrix.
+    """
+    if isinstance(data, OptionMatrix):
+        return data.rows, data.cols, data.options
+    codes, categories = stacked_codes(_single(data))
+    n_rows, n_cols = codes.shape
+    rows = np.repeat(np.arange(n_rows), n_cols)
+    codes = codes.ravel()
+    valid = codes >= 0
+    rows, codes = rows[valid], codes[valid]
+    if n_cols > 1:
+        # The same answer in two columns indexes its row once.
+        keys = np.unique(rows.astype(np.int64) * len(categories) + codes)
+        rows, codes = keys // len(categories), keys % len(categories)
+    return rows, codes, categories
+
+
+# Roles with more distinct answers than this get no stored bitmaps: one
+# bitmap per answer would cost answers x rows / 8 bytes.
+BITMAP_MAX_ANSWERS = 64
+
+
+class RowIndex:
+    """
+    Row positions and bitmaps of every answer of one role.
+
+    Positions are grouped by answer with a stable sort, so each group
+    stays in row order, and *offsets* mark where each group starts. The
+    rows giving one answer are then a slice of *rows*: filtering costs
+    O(matching rows) instead of a comparison over every row.
+
+    Each answer of a role with at most BITMAP_MAX_ANSWERS answers also
+    gets a packed bitmap of its rows (one bit per row), so any
+    combination of answers and roles is resolved with bitwise OR / AND
+    over n/8 bytes (see filter_rows()). Other roles (e.g. free text)
+    build the bitmap of a selection from its positions when asked.
+    """
+
+    def __init__(self, data):
+        rows, codes, self.categories = _answer_pairs(data)
+        self.n_rows = len(data)
+        self.rows = rows[np.argsort(codes, kind="stable")]
+        self.counts = np.bincount(codes, minlength=len(self.categories))
+        self.offsets = np.concatenate([[0], np.cumsum(self.counts)])
+
+        self.bitmaps = None
+        if len(self.categories) <= BITMAP_MAX_ANSWERS:
+            self.bitmaps = np.zeros(
+                (len(self.categories), (self.n_rows + 7) // 8), dtype=np.uint8
+            )
+            bits = np.zeros(self.n_rows, dtype=bool)
+            for code in np.flatnonzero(self.counts):
+                group = self.rows[self.offsets[code]:self.offsets[code + 1]]
+                bits[group] = True
+                self.bitmaps[code] = np.packbits(bits)
+                bits[group] = False
+
+    def answers(self):
+        """
+        Return the answers given by at least one row, in category order.
+        """
+        return self.categories[self.counts > 0].tolist()
+
+    def positions(self, answer):
+        """
+        Return the row positions giving *answer*, in row order.
+        """
+        try:
+            code = self.categories.get_loc(answer)
+        except KeyError:
+            return self.rows[:0]
+        return self.rows[self.offsets[code]:self.offsets[code + 1]]
+
+    def select(self, answers):
+        """
+        Return the packed bitmap of rows giving any of *answers*.
+        """
+        codes = self.categories.get_indexer(answers)
+        codes = codes[codes >= 0]
+        if self.bitmaps is not None:
+            if not len(codes):
+                return np.zeros(self.bitmaps.shape[1], dtype=np.uint8)
+            return np.bitwise_or.reduce(self.bitmaps[codes], axis=0)
+        bits = np.zeros(self.n_rows, dtype=bool)
+        for code in codes:
+            bits[self.rows[self.offsets[code]:self.offsets[code + 1]]] = True
+        return np.packbits(bits)
+
+
+def filter_rows(indexes, selections):
+    """
+    Return the positions of the rows matching every selection, or None
+    if nothing is selected.
+
+    *selections* maps keys of *indexes* (RowIndex objects over the same
+    rows) to the answers to keep; a row must give one of the selected
+    answers for each key. A single answer is one slice of its index;
+    anything else is ORed and ANDed as packed bitmaps, then gathered
+    once.
+    """
+    active = {key: answers for key, answers in selections.items() if answers}
+    if not active:
+        return None
+    if len(active) == 1:
+        key, answers = next(iter(active.items()))
+        if len(answers) == 1:
+            return indexes[key].positions(answers[0])
+
+    mask = None
+    for key, answers in active.items():
+        bits = indexes[key].select(answers)
+        mask = bits if mask is None else mask & bits
+    n_rows = next(iter(indexes.values())).n_rows
+    return np.flatnonzero(np.unpackbits(mask, count=n_rows))
+
+
+def row_indexes(df, roles, options):
+    """
+    Return a RowIndex for each role in *roles* (role -> columns), built
+    from its OptionMatrix in *options* for multi-select roles.
+    """
+    return {
+        role: RowIndex(options[role] if role in options else df[columns])
+        for role, columns in roles.items()
+    }
+
+
+# =====================================================
+# MULTI-SELECT ANSWERS
+# =====================================================
+# "Select all that apply" questions export the chosen options joined by
+# this separator, e.g. "ASEP guidance; Mentorship; Events".
+MULTI_SELECT_SEPARATOR = ";"
+
+# Roles that may be asked as "select all that apply".
+MULTI_SELECT_ROLES = ["confidence", "expectation"]
+
+
+def is_multi_select(data, sep=MULTI_SELECT_SEPARATOR):
+    """
+    Return True if any answer of a categorical Series or DataFrame
+    combines several options.
+    """
+    columns = [data] if isinstance(data, pd.Series) else [data[c] for c in data.columns]
+    return any(
+        pd.Series(col.cat.categories, dtype=object).str.contains(sep, regex=False).any()
+        for col in columns
+    )
+
+
+class OptionMatrix:
+    """
+    Sparse respondents x options indicator matrix.
+
+    Only the set entries are stored, as parallel *rows* / *cols* arrays
+    in row order, with *indptr* marking where each row starts (the CSR
+    layout). Option counts are column sums over *cols*, and selecting
+    respondents only touches their own entries.
+    """
+
+    def __init__(self, rows, cols, n_rows, options):
+        self.rows = rows
+        self.cols = cols
+        self.n_rows = n_rows
+        self.options = options
+        self.indptr = np.concatenate(
+            [[0], np.cumsum(np.bincount(rows, minlength=n_rows))]
+        )
+
+    @classmethod
+    def from_answers(cls, data, sep=MULTI_SELECT_SEPARATOR):
+        """
+        Split the multi-select answers of a categorical Series or DataFrame.
+
+        Each distinct answer is split once and respondents pick up its
+        options through their category codes, so no Python code runs per
+        row. An option chosen in several columns is set once.
+        """
+        codes, categories = stacked_codes(_single(data))
+        split = [
+            list(dict.fromkeys(o.strip() for o in str(answer).split(sep) if o.strip()))
+            for answer in categories
+        ]
+        options = pd.Index(sorted({o for opts in split for o in opts}), dtype=object)
+
+        # Options of every answer, back to back; code -1 (missing) picks
+        # the trailing empty answer.
+        lengths = np.array([len(opts) for opts in split] + [0], dtype=np.int64)
+        starts = np.cumsum(lengths) - lengths
+        answer_options = options.get_indexer([o for opts in split for o in opts])
+
+        n_rows, n_cols = codes.shape
+        flat = codes.ravel()
+        counts = lengths[flat]
+        within = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        rows = np.repeat(np.repeat(np.arange(n_rows), n_cols), counts)
+        cols = answer_options[np.repeat(starts[flat], counts) + within]
+        if n_cols > 1:
+            keys = np.unique(rows.astype(np.int64) * len(options) + cols)
+            rows, cols = keys // len(options), keys % len(options)
+        return cls(rows.astype(np.int32), cols.astype(np.int32), n_rows, options)
+
+    def __len__(self):
+        return self.n_rows
+
+    def counts(self):
+        """
+        Respondents per option, most frequent first; unselected options
+        are dropped.
+        """
+        counts = pd.Series(
+            np.bincount(self.cols, minlength=len(self.options)),
+            index=pd.Index(self.options, dtype=object),
+        )
+        counts = counts.sort_values(ascending=False, kind="stable")
+        return counts[counts > 0]
+
+    def contains(self, pattern, case=False):
+        """
+        Boolean array: did each respondent select an option matching the
+        regex *pattern*? The regex runs once per option.
+        """
+        hits = (
+            pd.Series(self.options, dtype=object)
+              .str.contains(pattern, case=case, regex=True)
+              .to_numpy(dtype=bool)
+        )
+        return np.bincount(self.rows[hits[self.cols]], minlength=self.n_rows) > 0
+
+    def take(self, positions):
+        """
+        Return the matrix of the respondents at *positions*, in order.
+        """
+        positions = np.asarray(positions)
+        counts = np.diff(self.indptr)[positions]
+        within = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        entries = np.repeat(self.indptr[positions], counts) + within
+        rows = np.repeat(np.arange(len(positions), dtype=np.int32), counts)
+        return OptionMatrix(rows, self.cols[entries], len(positions), self.options)
+
+
+def multi_select_options(df, roles):
+    """
+    Return {role: OptionMatrix} for the MULTI_SELECT_ROLES of *df* whose
+    answers combine several options. *roles* maps roles to columns.
+    """
+    return {
+        role: OptionMatrix.from_answers(df[roles[role]])
+        for role in MULTI_SELECT_ROLES
+        if roles.get(role) and is_multi_select(df[roles[role]])
+    }
+
+
+# =====================================================
+# RESPONSE COUNTS
+# =====================================================
+# Answer patterns behind the dashboard's headline numbers.
+MEMBER_PATTERN = "yes"
+CERTIFICATION_PATTERN = "ASEP|CSEP"
+EXPLORING_PATTERN = "exploring|decide"
+
+
+def response_counts(df, roles, options=None):
+    """
+    Return the aggregates the dashboard shows for the responses in *df*,
+    given its columns per role (a name or a list of names each).
+
+    Multi-select roles are counted per option, from *options* (as
+    returned by multi_select_options() for *df*) or split here.
+
+    Totals ("responses", "members", "asep", "exploring") are ints and
+    per-answer counts ("membership", "domain", "expectation") are
+    {answer: count} dicts, all JSON-serializable. Every entry is additive,
+    so the counts of more rows can be folded in with add_counts().
+    """
+    if options is None:
+        options = multi_select_options(df, roles)
+
+    def matches(role, pattern):
+        if role in options:
+            return options[role].contains(pattern)
+        return contains(df[roles[role]], pattern)
+
+    counts = {
+        "responses": len(df),
+        "members": int(matches("membership", MEMBER_PATTERN).sum()),
+        "asep": int(matches("confidence", CERTIFICATION_PATTERN).sum()),
+        "exploring": int(matches("membership", EXPLORING_PATTERN).sum()),
+    }
+    for role in ("membership", "domain", "expectation"):
+        role_counts = options[role].counts() if role in options else value_counts(df[roles[role]])
+        counts[role] = {str(answer): int(n) for answer, n in role_counts.items()}
+    return counts
+
+
+def add_counts(total, delta):
+    """
+    Return response_counts() of two sets of rows from the counts of each.
+    """
+    result = {}
+    for name, value in total.items():
+        if isinstance(value, dict):
+            merged = dict(value)
+            for answer, n in delta[name].items():
+                merged[answer] = merged.get(answer, 0) + n
+            result[name] = merged
+        else:
+            result[name] = value + delta[name]
+    return result
+
+
+def counts_series(answer_counts):
+    """
+    Turn an {answer: count} dict into a Series ordered like value_counts().
+    """
+    counts = pd.Series(answer_counts, dtype=np.int64)
+    return counts.sort_values(ascending=False, kind="stable")
+
+
+# =====================================================
+# COUNT CUBE
+# =====================================================
+class CountCube:
+    """
+    Respondent counts over (domain, membership, ASEP/CSEP flag).
+
+    Built once per survey, the cube answers every count the dashboard
+    shows by summing over axes; the member and exploring flags are
+    properties of the membership answer, so they are looked up per
+    membership category rather than kept as axes. Expectations are
+    multi-select, so they get a second cube of (respondent, answer)
+    pairs with an extra expectation axis. Each axis ends with a slot for
+    missing answers.
+
+    Filtering on domain or membership is slice() — the cost depends on
+    the cube size, not on the number of respondents.
+    """
+
+    def __init__(self, df, roles, options):
+        domain = _single(df[roles["domain"]])
+        membership = _single(df[roles["membership"]])
+        self.names = {"domain": domain.name, "membership": membership.name}
+        self.categories = {
+            "domain": domain.cat.categories,
+            "membership": membership.cat.categories,
+        }
+        n_domain = len(self.categories["domain"]) + 1
+        n_member = len(self.categories["membership"]) + 1
+
+        # Code -1 (missing) goes to the last slot of its axis.
+        d = domain.cat.codes.to_numpy().astype(np.int64) % n_domain
+        m = membership.cat.codes.to_numpy().astype(np.int64) % n_member
+        if "confidence" in options:
+            asep = options["confidence"].contains(CERTIFICATION_PATTERN)
+        else:
+            asep = contains(df[roles["confidence"]], CERTIFICATION_PATTERN)
+        cell = (d * n_member + m) * 2 + asep
+        self.shape = (n_domain, n_member, 2)
+        self.base = np.bincount(cell, minlength=np.prod(self.shape)).reshape(self.shape)
+
+        self._set_flags()
+
+        rows, codes, self.categories["expectation"] = _answer_pairs(
+            options["expectation"] if "expectation" in options
+            else df[roles["expectation"]]
+        )
+        n_expect = len(self.categories["expectation"])
+        self.expectations = np.bincount(
+            cell[rows] * n_expect + codes, minlength=np.prod(self.shape) * n_expect
+        ).reshape(self.shape + (n_expect,))
+
+    def _set_flags(self):
+        flags = pd.Series(self.categories["membership"], dtype=object)
+        self.member_flags = np.append(
+            flags.str.contains(MEMBER_PATTERN, case=False).to_numpy(dtype=bool), False
+        )
+        self.exploring_flags = np.append(
+            flags.str.contains(EXPLORING_PATTERN, case=False).to_numpy(dtype=bool), False
+        )
+
+    def merge(self, other):
+        """
+        Return a cube counting the respondents of both cubes, over the
+        union of their answers (this cube's answers first).
+        """
+        cube = copy.copy(self)
+        cube.categories = {
+            role: categories.append(
+                other.categories[role].difference(categories, sort=False)
+            )
+            for role, categories in self.categories.items()
+        }
+        cube.shape = (
+            len(cube.categories["domain"]) + 1, len(cube.categories["membership"]) + 1, 2
+        )
+        n_expect = len(cube.categories["expectation"])
+        cube.base = np.zeros(cube.shape, dtype=np.int64)
+        cube.expectations = np.zeros(cube.shape + (n_expect,), dtype=np.int64)
+        for part in (self, other):
+            # Each answer's slot in the merged cube; missing stays last.
+            d, m = (
+                np.append(cube.categories[role].get_indexer(part.categories[role]),
+                          len(cube.categories[role]))
+                for role in ("domain", "membership")
+            )
+            e = cube.categories["expectation"].get_indexer(part.categories["expectation"])
+            cube.base[np.ix_(d, m, [0, 1])] += part.base
+            cube.expectations[np.ix_(d, m, [0, 1], e)] += part.expectations
+        cube._set_flags()
+        return cube
+
+    def slice(self, selections):
+        """
+        Return a copy of the cube keeping only the selected "domain" and
+        "membership" answers (other keys of *selections* are ignored).
+        """
+        cube = copy.copy(self)
+        keep = np.ones(self.shape, dtype=bool)
+        for axis, role in enumerate(["domain", "membership"]):
+            answers = selections.get(role)
+            if answers:
+                codes = self.categories[role].get_indexer(answers)
+                selected = np.zeros(self.shape[axis], dtype=bool)
+                selected[codes[codes >= 0]] = True
+                keep &= np.expand_dims(selected, tuple(a for a in range(3) if a != axis))
+        cube.base = self.base * keep
+        cube.expectations = self.expectations * keep[..., None]
+        return cube
+
+    def counts(self):
+        """
+        Return the same aggregates as response_counts().
+        """
+        def answer_counts(totals, categories):
+            counts = pd.Series(totals[:len(categories)], index=categories)
+            counts = counts[counts > 0].sort_values(ascending=False, kind="stable")
+            return {str(answer): int(n) for answer, n in counts.items()}
+
+        by_member = self.base.sum(axis=(0, 2))
+        return {
+            "responses": int(self.base.sum()),
+            "members": int(by_member[self.member_flags].sum()),
+            "asep": int(self.base[:, :, 1].sum()),
+            "exploring": int(by_member[self.exploring_flags].sum()),
+            "membership": answer_counts(by_member, self.categories["membership"]),
+            "domain": answer_counts(self.base.sum(axis=(1, 2)), self.categories["domain"]),
+            "expectation": answer_counts(
+                self.expectations.sum(axis=(0, 1, 2)), self.categories["expectation"]
+            ),
+        }
+
+    def table(self, role):
+        """
+        Cross-tabulate domains against "membership" or "expectation",
+        like pd.crosstab(); missing answers are left out.
+        """
+        if role == "membership":
+            table = self.base.sum(axis=2)[:-1, :-1]
+            name = self.names["membership"]
+        else:
+            table = self.expectations.sum(axis=(1, 2))[:-1]
+            name = None
+        df = pd.DataFrame(
+            table,
+            index=pd.Index(self.categories["domain"], dtype=object, name=self.names["domain"]),
+            columns=pd.Index(self.categories[role], dtype=object, name=name),
+        )
+        return df.loc[df.sum(axis=1) > 0, df.sum(axis=0) > 0]
+
+
+# =====================================================
+# COMPUTATION GRAPH
+# =====================================================
+class ComputeGraph:
+    """
+    Lazily evaluated, memoized computations behind the dashboard sections.
+
+    Source nodes hold values set by the script (the loaded frame, the
+    selected filters) with a key naming their contents. A derived node
+    is keyed by its name and the keys of its inputs, so keys are known
+    without evaluating anything. get() evaluates a node only if no value
+    for its current key is memoized. A "lazy" node is passed its inputs
+    as functions and pulls only those the branch it takes needs.
+
+    Derived nodes keep their latest value in *memo* (a dict kept across
+    reruns, e.g. in the session state); "shared" nodes keep theirs in
+    *cache*, a ParseCache shared by every session.
+    """
+
+    def __init__(self, cache, memo=None):
+        self.cache = cache
+        self.memo = {} if memo is None else memo
+        self.timings = {}
+        self._sources = {}
+        self._nodes = {}
+        self._nested = []
+
+    def set(self, name, value, key):
+        """
+        Set source node *name* to *value*, whose contents *key* names.
+        """
+        self._sources[name] = (key, value)
+
+    def add(self, name, compute, inputs=(), shared=False, lazy=False):
+        """
+        Define node *name* as compute(*values of inputs*), or, if *lazy*,
+        as compute(*functions returning the values of inputs*).
+        """
+        self._nodes[name] = (compute, list(inputs), shared, lazy)
+
+    def key(self, name):
+        if name in self._sources:
+            return self._sources[name][0]
+        return (name,) + tuple(self.key(node) for node in self._nodes[name][1])
+
+    def get(self, name):
+        """
+        Return the value of node *name*, evaluating it on a memo miss.
+
+        timings[name] is the seconds its evaluation took, not counting
+        inputs it pulled, or None if the value was memoized; clear
+        timings to start timing a new run.
+        """
+        if name in self._sources:
+            return self._sources[name][1]
+        compute, inputs, shared, lazy = self._nodes[name]
+        key = self.key(name)
+        if shared:
+            value = self.cache.get(key)
+            if value is not None:
+                self.timings.setdefault(name, None)
+                return value
+        else:
+            stored = self.memo.get(name)
+            if stored is not None and stored[0] == key:
+                self.timings.setdefault(name, None)
+                return stored[1]
+
+        if lazy:
+            values = [functools.partial(self.get, node) for node in inputs]
+        else:
+            values = [self.get(node) for node in inputs]
+        self._nested.append(0.0)
+        start = time.perf_counter()
+        try:
+            if shared:
+                value = self.cache.get_or_parse(key, compute, *values)
+            else:
+                value = compute(*values)
+                self.memo[name] = (key, value)
+        finally:
+            seconds = time.perf_counter() - start
+            inputs_seconds = self._nested.pop()
+            if self._nested:
+                self._nested[-1] += seconds
+        self.timings[name] = seconds - inputs_seconds
+        return value
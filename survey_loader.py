@@ -0,0 +1,1942 @@
+"""
+Survey loading helpers for the INCOSE India dashboard.
+
+Streamlit re-executes the dashboard script on every widget interaction,
+so anything that must survive a rerun (like the parse cache) lives here,
+in an imported module, rather than in the script itself.
+"""
+
+import bisect
+import contextlib
+import gzip
+import hashlib
+import importlib.util
+import io
+import json
+import multiprocessing
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+import zipfile
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+import openpyxl
+import pandas as pd
+import pyarrow as pa
+from pyarrow import feather
+
+from survey_analysis import CountCube, add_counts, multi_select_options, response_counts
+from survey_profiles import PROFILES, match_profile, profile_synonyms
+
+# =====================================================
+# CONFIGURATION
+# =====================================================
+# Maximum number of parsed surveys kept in memory (least recently used
+# entries are dropped first).
+PARSE_CACHE_SIZE = int(os.environ.get("INCOSE_PARSE_CACHE_SIZE", "8"))
+
+# Excel readers in order of preference. "calamine" (Rust-backed) needs the
+# optional python-calamine package and is skipped when it is missing.
+EXCEL_ENGINES = os.environ.get("INCOSE_EXCEL_ENGINES", "calamine,openpyxl").split(",")
+
+# Total size of CACHE_DIR, in megabytes, before least recently used
+# surveys are evicted.
+CACHE_BUDGET_MB = float(os.environ.get("INCOSE_CACHE_BUDGET_MB", "512"))
+
+# Total size of the response datasets (see RESPONSE DATASETS), in
+# megabytes, before least recently used datasets are deleted. Datasets
+# are budgeted apart from CACHE_DIR's parsed surveys and evicted whole:
+# their rows may come from exports that are no longer around.
+DATASET_BUDGET_MB = float(os.environ.get("INCOSE_DATASET_BUDGET_MB", "1024"))
+
+# Rows per chunk when streaming CSV / TSV / JSONL exports.
+CHUNK_ROWS = int(os.environ.get("INCOSE_CHUNK_ROWS", "50000"))
+
+# Worker processes used to parse several sheets of one workbook at once.
+PARSE_WORKERS = int(os.environ.get("INCOSE_PARSE_WORKERS", str(os.cpu_count() or 1)))
+
+# Columns added to combined frames: the sheet (region) and the uploaded
+# file (survey wave) each row came from.
+REGION_COL = "Region"
+WAVE_COL = "Wave"
+DIMENSION_COLS = [REGION_COL, WAVE_COL]
+
+# Rows shown in the preview while a survey is still parsing, and how often
+# (in rows) parsers report their progress.
+PREVIEW_ROWS = int(os.environ.get("INCOSE_PREVIEW_ROWS", "50"))
+PROGRESS_EVERY = 5000
+
+# Optional local folder polled for new survey exports, and the polling
+# interval in seconds (see FolderWatcher).
+WATCH_DIR = os.environ.get("INCOSE_WATCH_DIR") or None
+WATCH_INTERVAL = float(os.environ.get("INCOSE_WATCH_INTERVAL", "30"))
+
+# Uploads are copied to disk in pieces of this size.
+SPOOL_CHUNK_BYTES = 1024 * 1024
+
+# Upload types accepted by the dashboard: survey files, and archives of
+# survey files.
+SURVEY_TYPES = ["xlsx", "csv", "tsv", "jsonl"]
+ARCHIVE_TYPES = ["zip", "gz"]
+
+# Directory of the on-disk survey store (see SURVEY STORE below), shared
+# by sessions and kept across server restarts.
+CACHE_DIR = os.environ.get(
+    "INCOSE_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".survey_cache"),
+)
+
+
+# =====================================================
+# CLEANING
+# =====================================================
+def normalize_names(names):
+    """
+    Stringify header names, strip them and collapse inner whitespace.
+    """
+    return (
+        pd.Index(names).astype(str)
+          .str.strip()
+          .str.replace(r"\s+", " ", regex=True)
+    )
+
+
+def clean_columns(df):
+    """
+    Normalize the column names of *df* in place and return it.
+    """
+    df.columns = normalize_names(df.columns)
+    return df
+
+
+def content_hash(data):
+    """
+    Return a stable hex digest for the raw bytes of an uploaded file.
+    """
+    return hashlib.sha256(data).hexdigest()
+
+
+# =====================================================
+# UPLOAD SOURCES
+# =====================================================
+# Parsers take a "source": the raw bytes of a file, the path of an upload
+# spooled to disk with spool_upload(), or an ArchiveMember. Paths are
+# preferred, as they are parsed straight from disk (openpyxl in read-only
+# mode, CSV in chunks) and cost nothing to hand to worker processes.
+def _as_file(source):
+    return io.BytesIO(source) if isinstance(source, bytes) else source
+
+
+class ArchiveMember:
+    """
+    A survey file inside a spooled .zip (*member* names it) or .gz
+    (*member* is None) upload.
+
+    Members are decompressed as a stream, never inflated into memory as a
+    whole. Instances are picklable, so worker processes can open them.
+    """
+
+    def __init__(self, path, member=None):
+        self.path = path
+        self.member = member
+
+    @contextlib.contextmanager
+    def open(self):
+        if self.member is None:
+            with gzip.open(self.path, "rb") as f:
+                yield f
+        else:
+            with zipfile.ZipFile(self.path) as archive, archive.open(self.member) as f:
+                yield f
+
+
+@contextlib.contextmanager
+def open_source(source, fmt):
+    """
+    Yield something pandas / openpyxl can read for *source*.
+
+    Text formats inside archives are streamed through the decompressor.
+    Workbooks need random access, so they are inflated chunk by chunk to
+    a temp file that is removed afterwards.
+    """
+    if not isinstance(source, ArchiveMember):
+        yield _as_file(source)
+    elif fmt != "xlsx":
+        with source.open() as f:
+            yield f
+    else:
+        fd, path = tempfile.mkstemp(prefix="incose_member_", suffix=".xlsx")
+        try:
+            with os.fdopen(fd, "wb") as out, source.open() as f:
+                shutil.copyfileobj(f, out, SPOOL_CHUNK_BYTES)
+            yield path
+        finally:
+            release_upload(path)
+
+
+def archive_format(name):
+    """
+    Return "zip" or "gz" for archive file names, else None.
+    """
+    fmt = os.path.splitext(name)[1].lower().lstrip(".")
+    return fmt if fmt in ARCHIVE_TYPES else None
+
+
+def archive_members(source, name):
+    """
+    List the survey files in an archive as (member, file name) pairs.
+
+    A zip member's file name is its path inside the archive, so members
+    in different folders ("north/responses.csv", "south/responses.csv")
+    stay apart. For .gz archives the member is None and the file name is
+    the archive name without ".gz" (e.g. "responses.csv.gz" holds
+    "responses.csv").
+    """
+    if archive_format(name) == "gz":
+        inner = os.path.basename(name)[:-len(".gz")]
+        survey_format(inner)
+        return [(None, inner)]
+
+    members = []
+    with zipfile.ZipFile(_as_file(source)) as archive:
+        for info in archive.infolist():
+            base = os.path.basename(info.filename)
+            if info.is_dir() or base.startswith(".") or "__MACOSX" in info.filename:
+                continue
+            if os.path.splitext(base)[1].lower().lstrip(".") in SURVEY_TYPES:
+                members.append((info.filename, info.filename))
+    if not members:
+        raise ValueError(f"{name} contains no survey files")
+    return members
+
+
+def spool_upload(fileobj, name):
+    """
+    Copy an uploaded file to a temp file, chunk by chunk, hashing it on
+    the way. Returns (content key, path); the caller owns the file.
+    """
+    digest = hashlib.sha256()
+    fd, path = tempfile.mkstemp(
+        prefix="incose_upload_", suffix=os.path.splitext(name)[1]
+    )
+    fileobj.seek(0)
+    with os.fdopen(fd, "wb") as out:
+        for chunk in iter(lambda: fileobj.read(SPOOL_CHUNK_BYTES), b""):
+            digest.update(chunk)
+            out.write(chunk)
+    return digest.hexdigest(), path
+
+
+def hash_file(path):
+    """
+    Return the content key of a file on disk, reading it in pieces.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(SPOOL_CHUNK_BYTES), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def release_upload(path):
+    """
+    Delete a spooled upload; missing files are ignored.
+    """
+    if path is not None:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+# =====================================================
+# COLUMN ROLES
+# =====================================================
+# Each role lists alternative keyword groups, most specific first. A
+# header matches a group when every keyword starts one of its words.
+ROLE_SYNONYMS = {
+    "membership": [
+        ["incose", "member"],       # e.g., "Are you an INCOSE member?"
+        ["membership", "status"],   # e.g., "Membership status"
+    ],
+    "confidence": [
+        ["decide"],                 # e.g., "What would help you decide?"
+        ["decision"],               # e.g., "Decision factors"
+    ],
+    "expectation": [
+        ["valuable"],               # e.g., "What would be valuable in 2026?"
+        ["expect"],                 # e.g., "What do you expect from INCOSE?"
+    ],
+    "domain": [
+        ["domain"],                 # e.g., "Domain"
+        ["industry"],               # e.g., "Industry / sector"
+    ],
+    # Optional: tell new responses from seen ones (see ResponseDataset).
+    "respondent": [
+        ["respondent", "id"],       # e.g., "Respondent ID"
+        ["response", "id"],         # e.g., "Response ID"
+    ],
+    "timestamp": [
+        ["timestamp"],              # e.g., "Timestamp"
+        ["submitted"],              # e.g., "Submitted at"
+    ],
+}
+
+# Roles whose answers may be spread over several questions (e.g. one
+# "valuable" question each for events, certification and mentoring).
+MULTI_COLUMN_ROLES = ["confidence", "expectation"]
+
+# Words that carry no meaning in a question; they are ignored when
+# scoring how much of a header a keyword group covers.
+STOP_WORDS = frozenset(
+    "a an and are be by did do does for from how in is it of on or the "
+    "to what which who would you your".split()
+)
+
+
+def _tokens(name):
+    """
+    Split a header into lowercase words, without stop words or numbers.
+    """
+    return [
+        t for t in re.findall(r"[a-z0-9]+", str(name).lower())
+        if t not in STOP_WORDS and not t.isdigit()
+    ]
+
+
+# Built-in keyword groups, followed by the synonyms of schema profiles.
+ROLE_GROUPS = {
+    role: groups + [
+        _tokens(phrase) for phrase in profile_synonyms().get(role, [])
+        if _tokens(phrase)
+    ]
+    for role, groups in ROLE_SYNONYMS.items()
+}
+
+# Exact headers named by schema profiles.
+PROFILE_COLUMNS = frozenset(
+    col for profile in PROFILES
+    for cols in profile.role_columns.values() for col in cols
+)
+
+
+
+def _role_rules_fingerprint():
+    return content_hash(json.dumps(
+        [
+            ROLE_GROUPS,
+            MULTI_COLUMN_ROLES,
+            sorted(STOP_WORDS),
+            [
+                [profile.name, profile.role_columns, profile.synonyms,
+                 {role: list(answers) for role, answers in profile.categories.items()}]
+                for profile in PROFILES
+            ],
+        ],
+        sort_keys=True,
+    ).encode("utf-8"))
+
+
+# Fingerprint of the rules above and the schema profiles. Stored surveys
+# only keep the role columns these rules found, so a survey stored under
+# other rules (before a synonym or profile was edited) is parsed again.
+ROLE_RULES = _role_rules_fingerprint()
+
+# Suffixes that tell the columns of one question asked per option apart:
+# "Q? [Events]", "Q? (Events)", "Q? - Events", and pandas' "Q?.1" for a
+# repeated header.
+OPTION_SUFFIX = re.compile(r"\s*(\[[^\]]*\]|\([^)]*\)|\s-\s.*|\.\d+)$")
+
+
+def question_stem(name):
+    """
+    Return a header without its option suffix, lowercased.
+    """
+    return OPTION_SUFFIX.sub("", " ".join(str(name).lower().split()))
+
+
+class HeaderIndex:
+    """
+    Inverted index from header words to column positions.
+
+    Headers are tokenized once; a keyword is then looked up by binary
+    search over the sorted vocabulary (keywords match word prefixes, so
+    "member" finds "membership"), which keeps resolution fast on exports
+    with hundreds of columns.
+    """
+
+    def __init__(self, columns):
+        self.columns = list(columns)
+        self.tokens = [_tokens(col) for col in self.columns]
+        postings = {}
+        for i, tokens in enumerate(self.tokens):
+            for token in tokens:
+                postings.setdefault(token, set()).add(i)
+        self.vocabulary = sorted(postings)
+        self.postings = postings
+
+    def lookup(self, keyword):
+        """
+        Return the positions of columns with a word starting with *keyword*.
+        """
+        found = set()
+        i = bisect.bisect_left(self.vocabulary, keyword)
+        while i < len(self.vocabulary) and self.vocabulary[i].startswith(keyword):
+            found |= self.postings[self.vocabulary[i]]
+            i += 1
+        return found
+
+    def candidates(self, groups):
+        """
+        Yield (score, position) for every column matching one of *groups*.
+
+        Scores favour headers the keywords cover more of ("Domain" over
+        "Comments on your domain"), then whole-word over prefix matches,
+        then earlier keyword groups and earlier columns.
+        """
+        for rank, keywords in enumerate(groups):
+            positions = set.intersection(*(self.lookup(k) for k in keywords))
+            for i in positions:
+                tokens = self.tokens[i]
+                covered = sum(any(t.startswith(k) for k in keywords) for t in tokens)
+                exact = sum(k in tokens for k in keywords)
+                yield (covered / len(tokens), exact / len(keywords), -rank, -i), i
+
+    def best(self, groups, exclude=()):
+        """
+        Return the best-scoring column for *groups*, or None.
+        """
+        scored = [(score, i) for score, i in self.candidates(groups) if i not in exclude]
+        if not scored:
+            return None
+        return max(scored)[1]
+
+
+def resolve_roles(columns):
+    """
+    Map every role in ROLE_SYNONYMS to its best column name (or None).
+
+    Columns named by a matching schema profile are taken as they are; the
+    other roles are resolved in order, each column serving at most one
+    role.
+    """
+    _, declared = match_profile(columns)
+    roles = {role: (declared or {}).get(role) for role in ROLE_GROUPS}
+    missing = [role for role, col in roles.items() if col is None]
+    if not missing:
+        return roles
+
+    index = HeaderIndex(columns)
+    taken = {i for i, col in enumerate(index.columns) if col in roles.values()}
+    for role in missing:
+        i = index.best(ROLE_GROUPS[role], exclude=taken)
+        if i is not None:
+            roles[role] = index.columns[i]
+            taken.add(i)
+    return roles
+
+
+def detect_roles(columns):
+    """
+    Map every role in ROLE_SYNONYMS to its column name (or None).
+
+    Resolutions are cached by header fingerprint, so loading another
+    export of the same form skips detection altogether.
+    """
+    columns = [str(col) for col in columns]
+    fingerprint = content_hash("\0".join(columns).encode("utf-8"))
+    return dict(ROLES_CACHE.get_or_parse(fingerprint, resolve_roles, columns))
+
+
+def resolve_role_columns(columns):
+    """
+    Map every role to the list of its columns, best match first.
+
+    If a schema profile matches, its roles take the columns it lists.
+    Otherwise MULTI_COLUMN_ROLES also take every other column asking the
+    same question as their best match (see question_stem()), in column
+    order, unless another role claimed it.
+    """
+    columns = list(columns)
+    roles = detect_roles(columns)
+    role_columns = {role: [col] if col else [] for role, col in roles.items()}
+    profile, _ = match_profile(columns)
+    if profile is not None:
+        role_columns.update(profile.match_columns(columns))
+        return role_columns
+
+    index = HeaderIndex(columns)
+    taken = set(filter(None, roles.values()))
+    for role in MULTI_COLUMN_ROLES:
+        if roles[role] is None:
+            continue
+        stem = question_stem(roles[role])
+        matches = sorted({i for _, i in index.candidates(ROLE_GROUPS[role])})
+        role_columns[role] += [
+            columns[i] for i in matches
+            if columns[i] not in taken and question_stem(columns[i]) == stem
+        ]
+        taken.update(role_columns[role])
+    return role_columns
+
+
+def detect_role_columns(columns):
+    """
+    Map every role to the list of its columns (see resolve_role_columns()),
+    cached by header fingerprint like detect_roles().
+    """
+    columns = [str(col) for col in columns]
+    fingerprint = content_hash("\0".join(["columns", *columns]).encode("utf-8"))
+    role_columns = ROLES_CACHE.get_or_parse(fingerprint, resolve_role_columns, columns)
+    return {role: list(cols) for role, cols in role_columns.items()}
+
+
+# =====================================================
+# CATEGORICAL ENCODING
+# =====================================================
+def string_codes(values):
+    """
+    Factorize *values* as strings into (int32 codes, sorted categories).
+
+    Values are hashed as they are and only the distinct ones are turned
+    into strings, so str() runs once per unique answer rather than once
+    per row. Missing values get code -1.
+    """
+    codes, uniques = pd.factorize(pd.Series(values, dtype=object))
+    labels = np.array([str(u) for u in uniques], dtype=object)
+    # Distinct raw values can share a string form (1 and "1").
+    label_codes, categories = pd.factorize(labels, sort=True)
+    remap = np.append(label_codes, -1).astype(np.int32)
+    return remap[codes], pd.Index(categories, dtype=object)
+
+
+def encode_categoricals(df):
+    """
+    Return *df* with every column as a Categorical of strings.
+
+    Role frames are encoded once at load time, so the dashboard's counts,
+    filters and crosstabs run on small integer codes instead of
+    re-stringifying object columns on every rerun. Missing answers stay
+    missing.
+    """
+    columns = {}
+    for col in df.columns:
+        if isinstance(df[col].dtype, pd.CategoricalDtype):
+            columns[col] = df[col]
+        else:
+            codes, categories = string_codes(df[col])
+            columns[col] = pd.Categorical.from_codes(codes, categories=categories)
+    return pd.DataFrame(columns, index=df.index)
+
+
+# =====================================================
+# PARSING
+# =====================================================
+def available_engines():
+    """
+    Return the configured Excel engines that are installed, in order.
+    """
+    modules = {"calamine": "python_calamine", "openpyxl": "openpyxl"}
+    return [
+        engine for engine in EXCEL_ENGINES
+        if engine in modules and importlib.util.find_spec(modules[engine])
+    ]
+
+
+def workbook_sheets(source):
+    """
+    Return the sheet names of an .xlsx workbook, in workbook order.
+    """
+    wb = openpyxl.load_workbook(_as_file(source), read_only=True)
+    try:
+        return wb.sheetnames
+    finally:
+        wb.close()
+
+
+def parse_workbook(source, engine="openpyxl", sheet=0):
+    """
+    Parse one sheet (the first by default) of an .xlsx workbook and clean
+    its column names.
+    """
+    df = pd.read_excel(_as_file(source), engine=engine, sheet_name=sheet)
+    return clean_columns(df)
+
+
+def _header_names(row):
+    """
+    Name header cells the way pandas does, so both loaders agree.
+    """
+    names = [
+        f"Unnamed: {i}" if value is None else value
+        for i, value in enumerate(row)
+    ]
+    return list(normalize_names(names))
+
+
+def _is_role_candidate(name):
+    if " ".join(str(name).split()) in PROFILE_COLUMNS:
+        return True
+    tokens = _tokens(name)
+    return any(
+        all(any(t.startswith(k) for t in tokens) for k in keywords)
+        for groups in ROLE_GROUPS.values()
+        for keywords in groups
+    )
+
+
+def _role_codes(profile, role, values):
+    """
+    Factorize one role column, against the answers *profile* declares for
+    it when they cover every value, else by inferring its categories.
+    """
+    encoded = profile.encode(role, values) if profile is not None else None
+    return encoded if encoded is not None else string_codes(values)
+
+
+def parse_workbook_roles(source, engine="openpyxl", sheet=0, progress=None):
+    """
+    Parse only the role columns of one sheet of an .xlsx workbook.
+
+    Row positions match parse_workbook(), so the full-width frame can be
+    lined up with this one later. *progress*, if given, is called with the
+    number of rows read so far.
+    """
+    if engine == "openpyxl":
+        return _stream_workbook_roles(source, sheet, progress)
+
+    # Other engines parse the whole sheet natively; usecols still keeps
+    # the non-role columns from ever becoming pandas objects.
+    df = clean_columns(
+        pd.read_excel(
+            _as_file(source),
+            engine=engine,
+            sheet_name=sheet,
+            usecols=_is_role_candidate,
+        )
+    )
+    df = df.loc[:, ~df.columns.duplicated()]
+    if progress:
+        progress(len(df))
+
+    # Declared answers are applied here too, as in the streamed path.
+    profile, _ = match_profile(df.columns)
+    col_roles = {}
+    for role, cols in detect_role_columns(df.columns).items():
+        for col in cols:
+            col_roles.setdefault(col, role)
+    return pd.DataFrame(
+        {
+            col: pd.Categorical.from_codes(*_role_codes(profile, role, df[col]))
+            for col, role in col_roles.items()
+        },
+        index=df.index,
+    )
+
+
+def _stream_workbook_roles(source, sheet=0, progress=None):
+    """
+    Read the header row, resolve it with detect_role_columns(), then stream the
+    remaining rows in openpyxl read-only mode keeping only those columns.
+    """
+    wb = openpyxl.load_workbook(_as_file(source), read_only=True, data_only=True)
+    try:
+        ws = wb[sheet] if isinstance(sheet, str) else wb.worksheets[sheet]
+        rows = ws.iter_rows(values_only=True)
+        header = _header_names(next(rows, ()))
+
+        positions = {}
+        col_roles = {}
+        for role, cols in detect_role_columns(header).items():
+            for col in cols:
+                if col not in positions:
+                    positions[col] = header.index(col)
+                    col_roles[col] = role
+        profile, _ = match_profile(header)
+
+        values = {col: [] for col in positions}
+        n_rows = kept = 0
+        for row in rows:
+            n_rows += 1
+            for col, i in positions.items():
+                values[col].append(row[i] if i < len(row) else None)
+            # Trailing blank rows are dropped, just like pd.read_excel does.
+            if any(v is not None for v in row):
+                kept = n_rows
+            if progress and n_rows % PROGRESS_EVERY == 0:
+                progress(n_rows)
+    finally:
+        wb.close()
+
+    return pd.DataFrame(
+        {
+            col: pd.Categorical.from_codes(
+                *_role_codes(profile, col_roles[col], vals[:kept])
+            )
+            for col, vals in values.items()
+        },
+        index=pd.RangeIndex(kept),
+    )
+
+
+def survey_format(name):
+    """
+    Return the survey format ("xlsx", "csv", ...) implied by a file name.
+    """
+    fmt = os.path.splitext(name)[1].lower().lstrip(".")
+    if fmt not in SURVEY_TYPES:
+        raise ValueError(f"Unsupported survey file type: {name}")
+    return fmt
+
+
+def parse_text(source, fmt):
+    """
+    Parse a whole CSV / TSV / JSONL export and clean its column names.
+    """
+    if fmt == "jsonl":
+        return clean_columns(pd.read_json(source, lines=True))
+    return clean_columns(pd.read_csv(source, sep="\t" if fmt == "tsv" else ","))
+
+
+def _combine_chunks(parts):
+    """
+    Merge per-chunk (codes, uniques) pairs into a single Categorical.
+    """
+    categories = pd.Index(
+        sorted(set().union(*(uniques for _, uniques in parts))), dtype=object
+    )
+    codes = [
+        # Remap chunk-local codes onto the shared categories; -1 stays NaN.
+        np.append(categories.get_indexer(uniques), -1).astype(np.int32)[chunk_codes]
+        for chunk_codes, uniques in parts
+    ]
+    return pd.Categorical.from_codes(
+        np.concatenate(codes) if codes else np.array([], dtype=np.int32),
+        categories=categories,
+    )
+
+
+def parse_text_roles(source, fmt, progress=None):
+    """
+    Stream a CSV / TSV / JSONL export in chunks, keeping only role columns.
+
+    Headers are cleaned and roles detected from the first chunk. Every
+    chunk is then cut down to the role columns and factorized into compact
+    integer codes before the next one is read, so peak memory is bounded
+    by the chunk size rather than the file size. Role columns come back as
+    pandas Categoricals.
+    """
+    if isinstance(source, ArchiveMember):
+        with open_source(source, fmt) as stream:
+            return parse_text_roles(stream, fmt, progress)
+
+    source = _as_file(source)
+    if fmt == "jsonl":
+        chunks = pd.read_json(source, lines=True, chunksize=CHUNK_ROWS)
+    else:
+        chunks = pd.read_csv(
+            source,
+            sep="\t" if fmt == "tsv" else ",",
+            dtype=str,
+            usecols=_is_role_candidate,
+            chunksize=CHUNK_ROWS,
+        )
+
+    keep = None
+    parts = {}
+    n_rows = 0
+    with chunks:
+        for chunk in chunks:
+            clean_columns(chunk)
+            chunk = chunk.loc[:, ~chunk.columns.duplicated()]
+            if keep is None:
+                col_roles = {}
+                for role, cols in detect_role_columns(chunk.columns).items():
+                    for col in cols:
+                        col_roles.setdefault(col, role)
+                keep = list(col_roles)
+                parts = {col: [] for col in keep}
+                # Known layouts are encoded against their declared answers.
+                profile, _ = match_profile(chunk.columns)
+            # JSON records may omit keys, so missing columns become NaN.
+            chunk = chunk.reindex(columns=keep)
+            for col in keep:
+                parts[col].append(_role_codes(profile, col_roles[col], chunk[col]))
+            n_rows += len(chunk)
+            if progress:
+                progress(n_rows)
+
+    return pd.DataFrame(
+        {col: _combine_chunks(col_parts) for col, col_parts in parts.items()},
+        index=pd.RangeIndex(n_rows),
+    )
+
+
+def parse_with_fallback(parse, source, *args):
+    """
+    Run parse(source, engine, *args) with each available engine until one
+    succeeds.
+
+    Returns (result, info) where info records the engine that was used and
+    the parse time in seconds.
+    """
+    error = None
+    for engine in available_engines():
+        start = time.perf_counter()
+        try:
+            result = parse(source, engine, *args)
+        except Exception as e:
+            error = e
+            continue
+        return result, {"engine": engine, "seconds": time.perf_counter() - start}
+    raise error or RuntimeError("No Excel engine is installed")
+
+
+# =====================================================
+# PARALLEL LOADING
+# =====================================================
+_process_pool = None
+_process_pool_lock = threading.Lock()
+
+
+def worker_context():
+    """
+    Return the multiprocessing context worker processes are started from.
+
+    Workers come from a fork server that preloads survey_loader, so they
+    start warm without forking the multi-threaded Streamlit server (a
+    forked copy can inherit a lock some other thread held, and hang).
+    Platforms without forkserver use "spawn". Either way a new worker
+    imports the dashboard as ``__mp_main__``, which is why the dashboard
+    only draws the page under ``if __name__ == "__main__"``.
+    """
+    if "forkserver" not in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("spawn")
+    context = multiprocessing.get_context("forkserver")
+    context.set_forkserver_preload([__name__])
+    return context
+
+
+def process_pool():
+    """
+    Return the shared worker pool, starting it on first use. The pool is
+    kept alive so worker start-up is only paid once.
+    """
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is None:
+            _process_pool = ProcessPoolExecutor(
+                max_workers=max(1, PARSE_WORKERS),
+                mp_context=worker_context(),
+            )
+        return _process_pool
+
+
+def _discard_pool(pool):
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is pool:
+            _process_pool = None
+    pool.shutdown(wait=False)
+
+
+def submit_to_pool(fn, *args):
+    """
+    Run fn(*args) in the worker pool; return its Future.
+
+    A worker that dies (e.g. out of memory on a huge sheet) breaks the
+    whole pool: the parses it was running fail, and the pool is replaced
+    so later parses start on fresh workers.
+    """
+    pool = process_pool()
+    try:
+        future = pool.submit(fn, *args)
+    except BrokenProcessPool:
+        # Broken by another parse; this one never ran.
+        _discard_pool(pool)
+        pool = process_pool()
+        future = pool.submit(fn, *args)
+
+    def check(done):
+        if not done.cancelled() and isinstance(done.exception(), BrokenProcessPool):
+            _discard_pool(pool)
+
+    future.add_done_callback(check)
+    return future
+
+
+def combine_surveys(frames, labels, label_col):
+    """
+    Stack role frames, tagging each row with its frame's label.
+
+    Frames may name a role differently (e.g. "Domain" vs "Primary
+    Domain"); every role column is renamed to the first name seen for
+    that role so they line up. Further columns of MULTI_COLUMN_ROLES keep
+    their names, as do existing DIMENSION_COLS.
+    """
+    frame_roles = [detect_roles(df.columns) for df in frames]
+    names = {}
+    for found in frame_roles:
+        for role, col in found.items():
+            if col is not None:
+                names.setdefault(role, col)
+    extras = [
+        col for col in dict.fromkeys(
+            col for df in frames
+            for cols in detect_role_columns(df.columns).values()
+            for col in cols[1:]
+        )
+        if col not in names.values()
+    ]
+
+    dimensions = [
+        col for col in DIMENSION_COLS
+        if col != label_col and any(col in df.columns for df in frames)
+    ]
+
+    parts = []
+    for df, found, label in zip(frames, frame_roles, labels):
+        rename = {col: names[role] for role, col in found.items() if col}
+        part = df[list(rename) + [c for c in extras + dimensions if c in df.columns]]
+        part = part.rename(columns=rename)
+        part[label_col] = label
+        parts.append(part)
+
+    combined = pd.concat(parts, ignore_index=True)
+    return encode_categoricals(
+        combined[list(names.values()) + extras + dimensions + [label_col]]
+    )
+
+
+def label_waves(names):
+    """
+    Label each survey file by its name without extension, numbering
+    repeated names ("responses", "responses (2)") so labels are unique.
+    """
+    labels = []
+    seen = {}
+    for name in names:
+        label = os.path.splitext(name)[0]
+        seen[label] = seen.get(label, 0) + 1
+        labels.append(label if seen[label] == 1 else f"{label} ({seen[label]})")
+    return labels
+
+
+def parse_sheets_roles(source, sheets, progress=None):
+    """
+    Parse the role columns of several sheets in parallel worker processes
+    and combine them with a REGION_COL naming each row's sheet.
+    """
+    start = time.perf_counter()
+    futures = [
+        submit_to_pool(
+            parse_with_fallback,
+            parse_workbook_roles,
+            source,
+            sheet,
+            progress.child(sheet) if progress else None,
+        )
+        for sheet in sheets
+    ]
+    results = [future.result() for future in futures]
+
+    df = combine_surveys([frame for frame, _ in results], sheets, REGION_COL)
+    return df, {
+        "engine": results[0][1]["engine"],
+        "seconds": time.perf_counter() - start,
+        "sheets": len(sheets),
+    }
+
+
+def selection_key(key, sheets):
+    """
+    Derive the cache key for a subset of sheets of the upload *key*.
+    """
+    if not sheets:
+        return key
+    return content_hash("\0".join([key, *sheets]).encode())
+
+
+# =====================================================
+# SURVEY STORE
+# =====================================================
+# Parsed surveys are kept in CACHE_DIR as one uncompressed Arrow IPC file
+# (memory-mapped on reload) plus one JSON metadata file per content key.
+# The Arrow file's mtime doubles as its last-use time for LRU eviction,
+# and its schema metadata records the ROLE_RULES it was parsed under.
+SIDECAR_RULES_KEY = b"incose_role_rules"
+
+
+def sidecar_path(key):
+    return os.path.join(CACHE_DIR, f"{key}.arrow")
+
+
+def meta_path(key):
+    return os.path.join(CACHE_DIR, f"{key}.json")
+
+
+def _current_rules(schema):
+    return (schema.metadata or {}).get(SIDECAR_RULES_KEY) == ROLE_RULES.encode("ascii")
+
+
+def read_sidecar(key, stale=False):
+    """
+    Memory-map the Arrow sidecar for *key*; return None if there is none,
+    or if it was parsed under other ROLE_RULES and *stale* is false.
+    """
+    path = sidecar_path(key)
+    try:
+        table = feather.read_table(path, memory_map=True)
+        if not (stale or _current_rules(table.schema)):
+            return None
+        # Mark as recently used for LRU eviction.
+        os.utime(path)
+    except FileNotFoundError:
+        return None
+    return table.to_pandas()
+
+
+def write_sidecar(key, df, meta=None):
+    """
+    Store *df* as an uncompressed Arrow IPC file so it can be memory-mapped,
+    along with its *meta* data, then trim the store to its size budget.
+
+    Sidecars are an optimization only: frames Arrow cannot represent
+    (e.g. mixed-type object columns) are simply not written.
+    """
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    path = sidecar_path(key)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        table = pa.Table.from_pandas(df)
+        table = table.replace_schema_metadata({
+            **(table.schema.metadata or {}),
+            SIDECAR_RULES_KEY: ROLE_RULES.encode("ascii"),
+        })
+        feather.write_feather(table, tmp_path, compression="uncompressed")
+        if meta is not None:
+            with open(meta_path(key), "w", encoding="utf-8") as f:
+                json.dump(meta, f)
+        # Atomic rename, so readers never see a half-written file.
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return False
+    evict_store()
+    return True
+
+
+def _store_entries():
+    """
+    Return (mtime, size, key) for every stored survey, oldest first.
+    """
+    entries = []
+    for entry in os.scandir(CACHE_DIR) if os.path.isdir(CACHE_DIR) else ():
+        if entry.name.endswith(".arrow"):
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry.name[:-len(".arrow")]))
+    return sorted(entries)
+
+
+def evict_store(budget_mb=None):
+    """
+    Delete least recently used surveys until the store fits its budget.
+    """
+    budget = (CACHE_BUDGET_MB if budget_mb is None else budget_mb) * 1024 * 1024
+    entries = _store_entries()
+    total = sum(size for _, size, _ in entries)
+    for _, size, key in entries:
+        if total <= budget:
+            break
+        for path in (sidecar_path(key), meta_path(key)):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        total -= size
+
+
+def is_stored(key):
+    """
+    Return True if the survey store holds a copy of *key* parsed under the
+    current ROLE_RULES.
+    """
+    try:
+        with pa.memory_map(sidecar_path(key)) as f:
+            return _current_rules(pa.ipc.open_file(f).schema)
+    except (FileNotFoundError, pa.ArrowInvalid):
+        return False
+
+
+def recent_surveys(limit=20):
+    """
+    Return metadata of stored surveys, most recently used first.
+
+    Every entry has its content "key" plus the metadata recorded when it
+    was parsed: file "name", "sheets", "rows", detected "roles", "engine",
+    "load_seconds" and "stored" (a Unix timestamp).
+    """
+    recent = []
+    for mtime, size, key in reversed(_store_entries()):
+        try:
+            with open(meta_path(key), encoding="utf-8") as f:
+                meta = json.load(f)
+        except (FileNotFoundError, ValueError):
+            continue
+        recent.append({**meta, "key": key, "last_used": mtime, "bytes": size})
+        if len(recent) >= limit:
+            break
+    return recent
+
+
+def load_survey_roles(key, source, name, sheets=None, progress=None):
+    """
+    Return (frame, info) for the role columns of an upload, preferring its
+    sidecar over parsing the file.
+
+    For workbooks, *sheets* selects the sheets to load; with more than one
+    they are parsed in parallel and tagged with REGION_COL. *key* must
+    already account for the selection (see selection_key()).
+
+    A sidecar parsed under other ROLE_RULES is parsed again from *source*;
+    it is only used as it is when the source is gone (*source* is None).
+    """
+    start = time.perf_counter()
+    df = read_sidecar(key, stale=source is None)
+    if df is not None:
+        return encode_categoricals(df), {
+            "engine": "arrow sidecar",
+            "seconds": time.perf_counter() - start,
+        }
+
+    if source is None:
+        raise FileNotFoundError(f"{name} is no longer in the survey store")
+
+    # Parsing runs in the worker pool, so several uploads parse in
+    # parallel and the server process stays responsive.
+    fmt = survey_format(name)
+    if fmt == "xlsx":
+        with open_source(source, fmt) as path:
+            if sheets and len(sheets) > 1:
+                df, info = parse_sheets_roles(path, sheets, progress)
+            else:
+                df, info = submit_to_pool(
+                    parse_with_fallback,
+                    parse_workbook_roles,
+                    path,
+                    sheets[0] if sheets else 0,
+                    progress,
+                ).result()
+    else:
+        df = submit_to_pool(parse_text_roles, source, fmt, progress).result()
+        info = {"engine": f"chunked {fmt}", "seconds": time.perf_counter() - start}
+    df = encode_categoricals(df)
+    write_sidecar(key, df, {
+        "name": name,
+        "sheets": sheets,
+        "rows": len(df),
+        "roles": detect_roles(df.columns),
+        "engine": info["engine"],
+        "load_seconds": info["seconds"],
+        "stored": time.time(),
+    })
+    return df, info
+
+
+def load_surveys(uploads, cache=None, progress=None):
+    """
+    Load several uploads concurrently through the parse cache.
+
+    *uploads* is a list of (key, source, name, sheets) tuples as taken by
+    load_survey_roles(). Already cached uploads are returned immediately;
+    the rest are parsed in parallel. Returns (frame, info) pairs in
+    upload order.
+    """
+    cache = cache or PARSE_CACHE
+    with ThreadPoolExecutor(max_workers=max(1, len(uploads))) as pool:
+        futures = [
+            pool.submit(
+                cache.get_or_parse,
+                key,
+                load_survey_roles,
+                key,
+                source,
+                name,
+                sheets,
+                progress.child(key) if progress else None,
+            )
+            for key, source, name, sheets in uploads
+        ]
+        return [future.result() for future in futures]
+
+
+def preview_survey(source, name, sheets=None, n_rows=PREVIEW_ROWS):
+    """
+    Read just the first *n_rows* rows (all columns) of an upload.
+    """
+    fmt = survey_format(name)
+    with open_source(source, fmt) as source:
+        if fmt == "xlsx":
+            df = pd.read_excel(
+                source, engine="openpyxl", sheet_name=sheets[0] if sheets else 0, nrows=n_rows
+            )
+        elif fmt == "jsonl":
+            df = pd.read_json(source, lines=True, nrows=n_rows)
+        else:
+            df = pd.read_csv(source, sep="\t" if fmt == "tsv" else ",", nrows=n_rows)
+    return clean_columns(df)
+
+
+def load_survey(source, name, sheets=None):
+    """
+    Return (frame, info) for every column of an upload.
+    """
+    fmt = survey_format(name)
+    with open_source(source, fmt) as source:
+        return _load_survey(source, fmt, sheets)
+
+
+def _load_survey(source, fmt, sheets):
+    if fmt == "xlsx" and sheets and len(sheets) > 1:
+        start = time.perf_counter()
+        results = [parse_with_fallback(parse_workbook, source, sheet) for sheet in sheets]
+        df = pd.concat(
+            [frame.assign(**{REGION_COL: sheet}) for (frame, _), sheet in zip(results, sheets)],
+            ignore_index=True,
+        )
+        return df, {
+            "engine": results[0][1]["engine"],
+            "seconds": time.perf_counter() - start,
+        }
+    if fmt == "xlsx":
+        return parse_with_fallback(parse_workbook, source, sheets[0] if sheets else 0)
+    start = time.perf_counter()
+    df = parse_text(_as_file(source), fmt)
+    return df, {"engine": fmt, "seconds": time.perf_counter() - start}
+
+
+# =====================================================
+# PARSE CACHE
+# =====================================================
+class ParseCache:
+    """
+    Thread-safe LRU cache of parsed surveys keyed by content hash.
+
+    Cached values are shared between reruns and sessions, so callers must
+    treat them as read-only. Concurrent misses on the same key are
+    single-flight: the first caller parses, the others wait for and share
+    its result.
+    """
+
+    def __init__(self, max_entries=PARSE_CACHE_SIZE):
+        self.max_entries = max(1, max_entries)
+        self._entries = OrderedDict()
+        self._in_flight = {}
+        self._lock = threading.Lock()
+        self._stats = {"parses": 0, "hits": 0, "shared": 0}
+
+    def get(self, key):
+        """
+        Return the cached value for *key* (counted as a hit), or None.
+        """
+        with self._lock:
+            if key not in self._entries:
+                return None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return self._entries[key]
+
+    def __contains__(self, key):
+        # A peek: neither a hit nor a use for the LRU order.
+        with self._lock:
+            return key in self._entries
+
+    def put(self, key, df):
+        with self._lock:
+            self._entries[key] = df
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_or_parse(self, key, parse, *args):
+        """
+        Return the cached value for *key*, computing parse(*args) on a miss.
+
+        If another thread is already parsing *key*, wait for its result
+        instead of parsing again.
+        """
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self._stats["hits"] += 1
+                return self._entries[key]
+            flight = self._in_flight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._in_flight[key] = Future()
+            else:
+                self._stats["shared"] += 1
+
+        if not leader:
+            return flight.result()
+
+        try:
+            df = parse(*args)
+        except BaseException as e:
+            with self._lock:
+                del self._in_flight[key]
+            flight.set_exception(e)
+            raise
+
+        # Cache the result before retiring the flight, so later callers
+        # always find one or the other.
+        self.put(key, df)
+        with self._lock:
+            del self._in_flight[key]
+            self._stats["parses"] += 1
+        flight.set_result(df)
+        return df
+
+    def count_shared(self, n=1):
+        """
+        Record *n* parses saved by sharing work done elsewhere.
+        """
+        with self._lock:
+            self._stats["shared"] += n
+
+    def stats(self):
+        """
+        Return counters: "parses" run, cache "hits", and parses saved by
+        "shared" in-flight results.
+        """
+        with self._lock:
+            return dict(self._stats)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+# Process-wide caches shared by every session of the dashboard: the
+# role-column frames, the (rarely needed) full-width frames, workbook
+# sheet names, column roles by header fingerprint, and structures derived
+# from a loaded frame (keyed by the frame's own cache key).
+PARSE_CACHE = ParseCache()
+RAW_CACHE = ParseCache(max_entries=4)
+SHEETS_CACHE = ParseCache(max_entries=32)
+ROLES_CACHE = ParseCache(max_entries=64)
+DERIVED_CACHE = ParseCache(max_entries=16)
+
+
+# =====================================================
+# BACKGROUND LOADING
+# =====================================================
+_progress_manager = None
+
+
+def _shared_progress():
+    """
+    Return a dict shared with the worker processes, for progress counters.
+
+    The manager process starts like the workers (see worker_context()).
+    """
+    global _progress_manager
+    with _process_pool_lock:
+        if _progress_manager is None:
+            _progress_manager = worker_context().Manager()
+        return _progress_manager.dict()
+
+
+class ProgressReporter:
+    """
+    Picklable progress callback: records the rows parsed so far under
+    *slot* in a dict shared between processes.
+    """
+
+    def __init__(self, shared, slot):
+        self.shared = shared
+        self.slot = slot
+
+    def __call__(self, rows):
+        self.shared[self.slot] = rows
+
+    def child(self, name):
+        return ProgressReporter(self.shared, f"{self.slot}/{name}")
+
+    def total(self):
+        return sum(self.shared.values())
+
+
+class LoadJob:
+    """
+    load_surveys() running on a background thread.
+
+    The dashboard polls a job for its preview and parse rate while it
+    runs, then collects the result. Jobs are shared through start_load(),
+    so a rerun (or another session) reattaches to a parse in flight
+    instead of starting it again. Spooled uploads in *owned_paths* are
+    deleted as soon as the parse cache holds their result.
+    """
+
+    def __init__(self, uploads, loaded=None, owned_paths=()):
+        self.uploads = uploads
+        self.owned_paths = list(owned_paths)
+        self.started = time.perf_counter()
+        self.preview = None
+        self._result = loaded
+        self._error = None
+        self._done = threading.Event()
+        if loaded is not None:
+            self._progress = None
+            self._done.set()
+        else:
+            self._progress = ProgressReporter(_shared_progress(), "load")
+            threading.Thread(target=self._run, daemon=True).start()
+
+    def _run(self):
+        # The parse starts first; the preview is read alongside it.
+        loader = threading.Thread(target=self._load, daemon=True)
+        loader.start()
+        try:
+            _, source, name, sheets = self.uploads[0]
+            # A workbook inside an archive would be inflated a second time
+            # just for the preview, so it goes without one.
+            archived = isinstance(source, ArchiveMember) and survey_format(name) == "xlsx"
+            if source is not None and not archived:
+                self.preview = preview_survey(source, name, sheets)
+        except Exception:
+            # Only a failed parse is an error; the preview is a nicety.
+            pass
+        loader.join()
+        # The raw uploads are no longer needed once parsed.
+        for path in self.owned_paths:
+            release_upload(path)
+        self.uploads = None
+        self._done.set()
+
+    def _load(self):
+        try:
+            self._result = load_surveys(self.uploads, progress=self._progress)
+        except Exception as e:
+            self._error = e
+
+    def wait(self, timeout=None):
+        return self._done.wait(timeout)
+
+    def done(self):
+        return self._done.is_set()
+
+    def rows_read(self):
+        return self._progress.total() if self._progress else 0
+
+    def rows_per_second(self):
+        elapsed = time.perf_counter() - self.started
+        return self.rows_read() / elapsed if elapsed > 0 else 0.0
+
+    def result(self):
+        """
+        Block until the job finishes; return its (frame, info) pairs or
+        raise its error.
+        """
+        self.wait()
+        if self._error is not None:
+            raise self._error
+        return self._result
+
+
+_jobs = {}
+_jobs_lock = threading.Lock()
+
+
+def start_load(uploads, cache=None, owned_paths=()):
+    """
+    Return a LoadJob for *uploads*, reusing one that is already running.
+
+    When every upload is already cached the job is returned finished,
+    without starting a thread. *owned_paths* are spooled uploads handed
+    over to the job; they are deleted right away if no new job needs them.
+    """
+    cache = cache or PARSE_CACHE
+    cached = [cache.get(key) for key, _, _, _ in uploads]
+    if all(value is not None for value in cached):
+        for path in owned_paths:
+            release_upload(path)
+        return LoadJob(uploads, loaded=cached)
+
+    job_key = selection_key("load", [key for key, _, _, _ in uploads])
+    with _jobs_lock:
+        for finished in [k for k, job in _jobs.items() if job.done()]:
+            del _jobs[finished]
+        if job_key in _jobs:
+            # Another rerun or session is already loading these uploads;
+            # only those not cached yet are saved parses.
+            cache.count_shared(sum(value is None for value in cached))
+            for path in owned_paths:
+                release_upload(path)
+        else:
+            _jobs[job_key] = LoadJob(uploads, owned_paths=owned_paths)
+        return _jobs[job_key]
+
+
+# =====================================================
+# WATCHED FOLDER
+# =====================================================
+class FolderWatcher:
+    """
+    Poll a local folder for survey exports and parse them in the
+    background.
+
+    An index of (mtime, size, content key) per file is kept in CACHE_DIR,
+    so unchanged files are neither re-hashed nor re-parsed, including
+    after a restart. Parsed surveys land in the parse cache and survey
+    store; uploads() only ever lists surveys that are ready, so viewers
+    never wait on a parse. *version* increases whenever that list
+    changes.
+
+    Files that fail to parse are left out and described in *errors*;
+    they are not retried until they change.
+    """
+
+    def __init__(self, directory, interval=WATCH_INTERVAL):
+        self.directory = directory
+        self.interval = interval
+        self.version = 0
+        self.error = None
+        self.errors = []
+        self._uploads = ()
+        self._lock = threading.Lock()
+        self._index_path = os.path.join(CACHE_DIR, "watch_index.json")
+        try:
+            with open(self._index_path, encoding="utf-8") as f:
+                self._index = json.load(f)
+        except (FileNotFoundError, ValueError):
+            self._index = {}
+        threading.Thread(target=self._poll, daemon=True).start()
+
+    def _poll(self):
+        while True:
+            try:
+                self.scan()
+                self.error = None
+            except Exception as e:
+                self.error = e
+            time.sleep(self.interval)
+
+    def _file_uploads(self, path, name, key):
+        """
+        Return load_surveys() tuples for one file in the folder.
+        """
+        if archive_format(name) is None:
+            return [(key, path, name, None)]
+        members = SHEETS_CACHE.get_or_parse(key, archive_members, path, name)
+        return [
+            (selection_key(key, [member_name]), ArchiveMember(path, member), member_name, None)
+            for member, member_name in members
+        ]
+
+    def scan(self):
+        """
+        Index the folder once and parse any new or changed surveys.
+        """
+        index = {}
+        uploads = []
+        files = {}
+        for entry in sorted(os.scandir(self.directory), key=lambda e: e.name):
+            ext = os.path.splitext(entry.name)[1].lower().lstrip(".")
+            if not entry.is_file() or ext not in SURVEY_TYPES + ARCHIVE_TYPES:
+                continue
+            stat = entry.stat()
+            known = self._index.get(entry.path)
+            if known and (known["mtime"], known["size"]) == (stat.st_mtime, stat.st_size):
+                info = index[entry.path] = dict(known, failed=dict(known.get("failed", {})))
+            else:
+                info = index[entry.path] = {
+                    "mtime": stat.st_mtime,
+                    "size": stat.st_size,
+                    "key": hash_file(entry.path),
+                    "failed": {},
+                }
+            if info["failed"].get(info["key"]):
+                continue
+            try:
+                file_uploads = self._file_uploads(entry.path, entry.name, info["key"])
+            except Exception as e:
+                info["failed"][info["key"]] = f"{entry.name}: {type(e).__name__}: {e}"
+                continue
+            for upload in file_uploads:
+                if upload[0] not in info["failed"]:
+                    uploads.append(upload)
+                    files[upload[0]] = entry.path
+
+        # Each survey is parsed on its own, so one bad export does not
+        # hold back the others; failures are kept in the index and not
+        # retried until the file changes.
+        missing = [
+            upload for upload in uploads
+            if upload[0] not in PARSE_CACHE and not is_stored(upload[0])
+        ]
+        with ThreadPoolExecutor(max_workers=max(1, len(missing))) as pool:
+            futures = [(upload, pool.submit(load_surveys, [upload])) for upload in missing]
+        for upload, future in futures:
+            try:
+                future.result()
+            except Exception as e:
+                path = files[upload[0]]
+                name = os.path.basename(path)
+                if upload[2] != name:
+                    name = f"{name} ({upload[2]})"
+                index[path]["failed"][upload[0]] = f"{name}: {type(e).__name__}: {e}"
+        uploads = [
+            upload for upload in uploads
+            if upload[0] not in index[files[upload[0]]]["failed"]
+        ]
+        self.errors = [
+            message for info in index.values() for message in info["failed"].values()
+        ]
+
+        with self._lock:
+            if [u[0] for u in uploads] != [u[0] for u in self._uploads]:
+                self._uploads = tuple(uploads)
+                self.version += 1
+        if index != self._index:
+            self._index = index
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            with open(self._index_path, "w", encoding="utf-8") as f:
+                json.dump(index, f)
+
+    def uploads(self):
+        """
+        Return load_surveys() tuples for every parsed survey in the folder.
+        """
+        with self._lock:
+            return list(self._uploads)
+
+
+_watcher = None
+
+
+def folder_watcher():
+    """
+    Return the process-wide watcher of WATCH_DIR, or None if unset.
+    """
+    global _watcher
+    if WATCH_DIR is None:
+        return None
+    with _jobs_lock:
+        if _watcher is None:
+            _watcher = FolderWatcher(WATCH_DIR)
+        return _watcher
+
+
+# =====================================================
+# RESPONSE DATASETS
+# =====================================================
+# Responses to a survey that is still open arrive as a series of growing
+# exports. A dataset keeps each export's unseen rows as one more Arrow
+# segment, so nothing that was stored before is rewritten, and keeps the
+# dashboard's aggregates current by adding the counts of those rows.
+# Datasets count against DATASET_BUDGET_MB, not CACHE_BUDGET_MB.
+DATASET_DIR = os.path.join(CACHE_DIR, "datasets")
+REQUIRED_ROLES = ["membership", "confidence", "expectation", "domain"]
+
+
+def _timestamps(series):
+    """
+    Parse a categorical column as datetime64, once per distinct answer.
+    Unparseable and missing answers become NaT.
+    """
+    parsed = pd.to_datetime(
+        pd.Series(series.cat.categories, dtype=object), errors="coerce", utc=True
+    ).dt.tz_localize(None).to_numpy(dtype="datetime64[ns]")
+    return np.append(parsed, np.datetime64("NaT", "ns"))[series.cat.codes.to_numpy()]
+
+
+class ResponseDataset:
+    """
+    Persistent, append-only collection of the responses to one survey.
+
+    New rows are told apart from stored ones by the "respondent" role
+    column if the export has one, else by a "timestamp" high-water mark,
+    else by position (exports are assumed to only ever grow).
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.directory = os.path.join(
+            DATASET_DIR, content_hash(name.encode("utf-8"))[:16]
+        )
+        self._lock = threading.Lock()
+        self._open()
+
+    def _open(self):
+        self._cube = None
+        self._seen = None
+        try:
+            with open(os.path.join(self.directory, "dataset.json"), encoding="utf-8") as f:
+                self.meta = json.load(f)
+        except (FileNotFoundError, ValueError):
+            self.meta = {
+                "name": self.name,
+                "rows": 0,
+                "roles": None,
+                "parts": [],
+                "sources": [],
+                "high_water": None,
+                "counts": None,
+            }
+
+    @property
+    def key(self):
+        """
+        Cache key of the dataset's current contents.
+        """
+        return selection_key(self.directory, [str(self.meta["rows"])])
+
+    @property
+    def rows(self):
+        return self.meta["rows"]
+
+    @property
+    def counts(self):
+        """
+        response_counts() of every stored row, or None if some export
+        lacked a required role column.
+        """
+        return self.meta["counts"]
+
+    def _part_path(self, part):
+        return os.path.join(self.directory, part)
+
+    def _seen_ids(self, id_col):
+        """
+        Return the set of stored respondent IDs, read once per process.
+
+        Each append records the IDs of its part as one line of ids.jsonl,
+        so the set is never rebuilt from the parts. Lines for parts the
+        metadata does not list (an append that did not finish) are
+        ignored, and a later line for a part replaces an earlier one.
+        Parts without a line are read once and recorded.
+        """
+        if self._seen is not None:
+            return self._seen
+        recorded = {}
+        try:
+            with open(self._part_path("ids.jsonl"), encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue
+                    recorded[entry["part"]] = entry["ids"]
+        except FileNotFoundError:
+            pass
+        seen = set()
+        for part in self.meta["parts"]:
+            if part not in recorded:
+                table = feather.read_table(self._part_path(part), memory_map=True)
+                ids = table.column(id_col).to_pylist() if id_col in table.column_names else []
+                self._record_ids(part, ids)
+                recorded[part] = ids
+            seen.update(recorded[part])
+        self._seen = seen
+        return seen
+
+    def _record_ids(self, part, ids):
+        with open(self._part_path("ids.jsonl"), "a", encoding="utf-8") as f:
+            f.write(json.dumps({"part": part, "ids": ids}) + "\n")
+
+    def _new_rows(self, df, roles):
+        """
+        Return a boolean mask of the rows of *df* not stored yet.
+        """
+        id_col = roles["respondent"]
+        ts_col = roles["timestamp"]
+        if id_col and self.meta["rows"]:
+            return ~df[id_col].isin(self._seen_ids(id_col)).to_numpy()
+        if ts_col and self.meta["high_water"] is not None:
+            return _timestamps(df[ts_col]) > np.datetime64(self.meta["high_water"])
+        return np.arange(len(df)) >= self.meta["rows"]
+
+    def append(self, key, df):
+        """
+        Append the rows of the export *df* that are not stored yet.
+
+        *key* identifies the export; appending the same export again is a
+        no-op. Returns the number of rows appended.
+
+        Appending may evict other datasets (see evict_datasets()).
+        """
+        with self._lock:
+            appended = self._append(key, df)
+        if appended:
+            evict_datasets(keep=self.directory)
+        return appended
+
+    def _append(self, key, df):
+        if key in self.meta["sources"]:
+            return 0
+        found = detect_roles(df.columns)
+        roles = self.meta["roles"] or found
+        # Later exports may word a header differently.
+        df = df.rename(columns={
+            col: roles[role] for role, col in found.items()
+            if col and roles[role]
+        })
+        roles = {role: roles[role] if found[role] else None for role in roles}
+        new = df[self._new_rows(df, roles)].reset_index(drop=True)
+
+        counts = self.meta["counts"]
+        cube = None
+        if all(roles[role] for role in REQUIRED_ROLES):
+            role_columns = detect_role_columns(new.columns)
+            options = multi_select_options(new, role_columns)
+            delta = response_counts(new, role_columns, options)
+            if counts is not None:
+                counts = add_counts(counts, delta)
+            elif not self.meta["rows"]:
+                counts = delta
+            if self._cube is not None and len(new):
+                cube = self._cube.merge(CountCube(new, role_columns, options))
+        else:
+            counts = None
+
+        os.makedirs(self.directory, exist_ok=True)
+        parts = list(self.meta["parts"])
+        if len(new):
+            part = f"part-{len(parts):05d}.arrow"
+            tmp_path = f"{self._part_path(part)}.tmp"
+            feather.write_feather(new, tmp_path, compression="uncompressed")
+            os.replace(tmp_path, self._part_path(part))
+            parts.append(part)
+            if roles["respondent"]:
+                ids = new[roles["respondent"]].astype(object)
+                ids = ids.where(ids.notna(), None).tolist()
+                self._record_ids(part, ids)
+                if self._seen is not None:
+                    self._seen.update(ids)
+
+        high_water = self.meta["high_water"]
+        if roles["timestamp"]:
+            times = _timestamps(new[roles["timestamp"]])
+            times = times[~np.isnat(times)]
+            if len(times):
+                latest = times.max()
+                if high_water is not None:
+                    latest = max(latest, np.datetime64(high_water))
+                high_water = str(latest)
+
+        meta = {
+            **self.meta,
+            "rows": self.meta["rows"] + len(new),
+            "roles": self.meta["roles"] or found,
+            "parts": parts,
+            "sources": self.meta["sources"] + [key],
+            "high_water": high_water,
+            "counts": counts,
+            "updated": time.time(),
+        }
+        meta_file = os.path.join(self.directory, "dataset.json")
+        with open(f"{meta_file}.tmp", "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(f"{meta_file}.tmp", meta_file)
+        self.meta = meta
+        if len(new):
+            self._cube = cube
+        return len(new)
+
+    def cube(self):
+        """
+        Return the CountCube of every stored row.
+
+        The cube is built from frame() on first use, then kept current by
+        append() merging in a cube of each export's new rows.
+        """
+        with self._lock:
+            if self._cube is None:
+                df = self.frame()
+                role_columns = detect_role_columns(df.columns)
+                self._cube = CountCube(
+                    df, role_columns, multi_select_options(df, role_columns)
+                )
+            return self._cube
+
+    def frame(self):
+        """
+        Return every stored response as one frame of Categoricals.
+        """
+        parts = [
+            feather.read_table(self._part_path(part), memory_map=True).to_pandas()
+            for part in self.meta["parts"]
+        ]
+        if not parts:
+            return pd.DataFrame(columns=list(filter(None, (self.meta["roles"] or {}).values())))
+        return encode_categoricals(pd.concat(parts, ignore_index=True))
+
+
+_datasets = {}
+
+
+def response_dataset(name):
+    """
+    Return the process-wide ResponseDataset called *name*, marking it as
+    recently used for evict_datasets().
+    """
+    with _jobs_lock:
+        if name not in _datasets:
+            _datasets[name] = ResponseDataset(name)
+        dataset = _datasets[name]
+    with contextlib.suppress(FileNotFoundError):
+        os.utime(os.path.join(dataset.directory, "dataset.json"))
+    return dataset
+
+
+def _dataset_entries():
+    """
+    Return (last use, size, directory) for every stored dataset, least
+    recently used first.
+    """
+    entries = []
+    for entry in os.scandir(DATASET_DIR) if os.path.isdir(DATASET_DIR) else ():
+        if not entry.is_dir():
+            continue
+        try:
+            last_use = os.stat(os.path.join(entry.path, "dataset.json")).st_mtime
+            size = sum(f.stat().st_size for f in os.scandir(entry.path) if f.is_file())
+        except FileNotFoundError:
+            continue
+        entries.append((last_use, size, entry.path))
+    return sorted(entries)
+
+
+def evict_datasets(budget_mb=None, keep=None):
+    """
+    Delete least recently used datasets, whole, until the datasets fit
+    their budget. The dataset in directory *keep* is never deleted.
+    """
+    budget = (DATASET_BUDGET_MB if budget_mb is None else budget_mb) * 1024 * 1024
+    entries = _dataset_entries()
+    total = sum(size for _, size, _ in entries)
+    for _, size, directory in entries:
+        if total <= budget:
+            break
+        if directory == keep:
+            continue
+        with _jobs_lock:
+            open_datasets = [d for d in _datasets.values() if d.directory == directory]
+        with contextlib.ExitStack() as stack:
+            for dataset in open_datasets:
+                stack.enter_context(dataset._lock)
+            shutil.rmtree(directory, ignore_errors=True)
+            # Datasets still held by sessions start over, empty.
+            for dataset in open_datasets:
+                dataset._open()
+        total -= size
@@ -0,0 +1,174 @@
+"""
+Schema profiles for known survey layouts.
+
+A profile declares, for each role, the exact column header of a known
+form (or "columns", for a role asked over several questions), synonyms
+for rewordings of it and, for closed questions, the expected answers.
+Profiles are read from JSON files (or YAML files, if PyYAML is
+installed) in PROFILE_DIR and compiled once at import, so wording
+changes are handled by editing a profile rather than the code.
+
+Example profile (JSON):
+
+    {
+      "name": "INCOSE India 2026",
+      "roles": {
+        "membership": {
+          "column": "Are you an INCOSE member?",
+          "synonyms": ["membership status"],
+          "answers": ["Yes", "No", "Exploring", "Will decide later"]
+        },
+        "expectation": {
+          "columns": ["Valuable in 2026? [Events]", "Valuable in 2026? [Mentoring]"]
+        },
+        "respondent": "Respondent ID"
+      }
+    }
+"""
+
+import importlib.util
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+
+# =====================================================
+# CONFIGURATION
+# =====================================================
+PROFILE_DIR = os.environ.get(
+    "INCOSE_PROFILE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "profiles"),
+)
+
+def _normalize(name):
+    # Same as survey_loader.normalize_names() for a single header.
+    return " ".join(str(name).split())
+
+
+# =====================================================
+# PROFILES
+# =====================================================
+class SchemaProfile:
+    """
+    A compiled profile: exact columns, synonym phrases and answer
+    categories per role.
+
+    *columns* maps each role to its first column, *role_columns* to all
+    of them.
+    """
+
+    def __init__(self, spec, source="<profile>"):
+        if not isinstance(spec.get("roles"), dict) or not spec["roles"]:
+            raise ValueError(f"{source}: a profile needs a 'roles' mapping")
+        self.name = spec.get("name", os.path.splitext(os.path.basename(source))[0])
+        self.columns = {}
+        self.role_columns = {}
+        self.synonyms = {}
+        self.categories = {}
+        for role, rule in spec["roles"].items():
+            if isinstance(rule, str):
+                rule = {"column": rule}
+            names = rule.get("columns") or ([rule["column"]] if rule.get("column") else [])
+            if names:
+                self.role_columns[role] = [_normalize(col) for col in names]
+                self.columns[role] = self.role_columns[role][0]
+            self.synonyms[role] = list(rule.get("synonyms", []))
+            if rule.get("answers"):
+                self.categories[role] = pd.Index(
+                    sorted({str(a) for a in rule["answers"]}), dtype=object
+                )
+
+    def match(self, columns):
+        """
+        Map roles to their first column if every declared column is
+        present in *columns*; return None otherwise.
+        """
+        matched = self.match_columns(columns)
+        if matched is None:
+            return None
+        return {role: cols[0] for role, cols in matched.items()}
+
+    def match_columns(self, columns):
+        """
+        Like match(), but map roles to the list of all their columns.
+        """
+        by_name = {}
+        for col in columns:
+            by_name.setdefault(_normalize(col), col)
+        if not all(col in by_name for cols in self.role_columns.values() for col in cols):
+            return None
+        return {
+            role: [by_name[col] for col in cols]
+            for role, cols in self.role_columns.items()
+        }
+
+    def encode(self, role, values):
+        """
+        Factorize *values* of *role* against its declared answers.
+
+        Returns (int32 codes, categories) like survey_loader.string_codes(),
+        or None if the role has no vocabulary or an answer falls outside
+        it, in which case the caller infers categories instead.
+        """
+        categories = self.categories.get(role)
+        if categories is None:
+            return None
+        values = pd.Series(values, dtype=object)
+        codes = categories.get_indexer(values)
+        if (codes[values.notna().to_numpy()] < 0).any():
+            return None
+        return codes.astype(np.int32), categories
+
+
+def _read_spec(path):
+    with open(path, encoding="utf-8") as f:
+        if path.endswith(".json"):
+            return json.load(f)
+        import yaml
+        return yaml.safe_load(f)
+
+
+def load_profiles(directory=PROFILE_DIR):
+    """
+    Compile every profile in *directory*, in file name order.
+
+    YAML files are skipped when PyYAML is not installed.
+    """
+    extensions = [".json"]
+    if importlib.util.find_spec("yaml") is not None:
+        extensions += [".yaml", ".yml"]
+    if not os.path.isdir(directory):
+        return []
+    return [
+        SchemaProfile(_read_spec(os.path.join(directory, name)), name)
+        for name in sorted(os.listdir(directory))
+        if os.path.splitext(name)[1].lower() in extensions
+    ]
+
+
+PROFILES = load_profiles()
+
+
+def match_profile(columns):
+    """
+    Return (profile, {role: column}) for the first profile whose columns
+    are all in *columns*, or (None, None).
+    """
+    for profile in PROFILES:
+        roles = profile.match(columns)
+        if roles is not None:
+            return profile, roles
+    return None, None
+
+
+def profile_synonyms():
+    """
+    Return the synonym phrases every profile declares, per role.
+    """
+    synonyms = {}
+    for profile in PROFILES:
+        for role, groups in profile.synonyms.items():
+            synonyms.setdefault(role, []).extend(groups)
+    return synonyms
@@ -0,0 +1,72 @@
+import os
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# Keep the survey store out of the checkout; survey_loader reads this on
+# import.
+os.environ.setdefault("INCOSE_CACHE_DIR", tempfile.mkdtemp(prefix="incose_tests_"))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+MEMBERSHIP = ["Yes", "No", "Exploring", "Will decide later"]
+CONFIDENCE = ["ASEP guidance", "CSEP roadmap", "Events", "Mentorship", "Peers"]
+EXPECTATION = ["Events", "Webinars", "Mentoring", "Certification", "Networking"]
+DOMAINS = ["Defence", "Healthcare", "Automotive", "Space", "Rail"]
+
+COLUMNS = {
+    "timestamp": "Timestamp",
+    "respondent": "Respondent ID",
+    "membership": "Are you an INCOSE member?",
+    "confidence": "What would help you decide?",
+    "expectation": "What would be valuable in 2026?",
+    "domain": "Primary Domain",
+}
+
+
+def _answers(rng, choices, n, multi=False, missing=0.05):
+    """
+    Draw *n* answers; multi-select answers join 1-3 options with "; ".
+    """
+    values = []
+    for _ in range(n):
+        if rng.random() < missing:
+            values.append(None)
+        elif multi:
+            picked = rng.choice(choices, size=rng.integers(1, 4), replace=False)
+            values.append("; ".join(picked))
+        else:
+            values.append(str(rng.choice(choices)))
+    return values
+
+
+def make_survey(n, seed=0, start=0, multi=True):
+    """
+    Return a raw survey export of *n* respondents numbered from *start*.
+    """
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        COLUMNS["timestamp"]: [
+            str(pd.Timestamp("2026-01-01") + pd.Timedelta(minutes=i))
+            for i in range(start, start + n)
+        ],
+        COLUMNS["respondent"]: [str(i) for i in range(start, start + n)],
+        COLUMNS["membership"]: _answers(rng, MEMBERSHIP, n),
+        COLUMNS["confidence"]: _answers(rng, CONFIDENCE, n, multi=multi),
+        COLUMNS["expectation"]: _answers(rng, EXPECTATION, n, multi=multi),
+        COLUMNS["domain"]: _answers(rng, DOMAINS, n),
+    })
+
+
+@pytest.fixture
+def survey():
+    from survey_loader import encode_categoricals
+
+    return encode_categoricals(make_survey(500))
+
+
+@pytest.fixture
+def roles():
+    return {role: [col] for role, col in COLUMNS.items()}
@@ -0,0 +1,252 @@
+import re
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import COLUMNS, make_survey
+from survey_analysis import (
+    BITMAP_MAX_ANSWERS,
+    ComputeGraph,
+    CountCube,
+    OptionMatrix,
+    RowIndex,
+    add_counts,
+    filter_rows,
+    multi_select_options,
+    response_counts,
+    row_indexes,
+)
+from survey_loader import ParseCache, encode_categoricals
+
+
+def naive_options(df):
+    """
+    The set of options each row selected, over every column of *df*.
+    """
+    return [
+        {o.strip() for answer in row if isinstance(answer, str) for o in answer.split(";")}
+        - {""}
+        for row in df.astype(object).itertuples(index=False)
+    ]
+
+
+def naive_mask(df, roles, selections):
+    mask = np.ones(len(df), dtype=bool)
+    for role, answers in selections.items():
+        if answers:
+            mask &= df[roles[role]].isin(answers).any(axis=1).to_numpy()
+    return mask
+
+
+@pytest.fixture
+def two_questions(survey):
+    # A second "valuable" question repeating some options of the first.
+    rng = np.random.default_rng(1)
+    first = survey[COLUMNS["expectation"]].astype(object)
+    second = [
+        answer if answer is not None and rng.random() < 0.3 else "Events; Podcasts"
+        for answer in first.where(first.notna(), None)
+    ]
+    raw = pd.DataFrame({"first": first, "second": second})
+    return encode_categoricals(raw)
+
+
+# =====================================================
+# OPTION MATRIX
+# =====================================================
+def test_option_matrix_counts_each_respondent_once(two_questions):
+    matrix = OptionMatrix.from_answers(two_questions)
+    expected = Counter(o for opts in naive_options(two_questions) for o in opts)
+
+    counts = matrix.counts()
+    assert counts.to_dict() == dict(expected)
+    assert counts.is_monotonic_decreasing
+    assert len(matrix) == len(two_questions)
+
+
+def test_option_matrix_contains(two_questions):
+    matrix = OptionMatrix.from_answers(two_questions)
+    pattern = re.compile("ment|pod", re.IGNORECASE)
+    expected = [any(pattern.search(o) for o in opts) for opts in naive_options(two_questions)]
+
+    assert matrix.contains("ment|pod").tolist() == expected
+
+
+def test_option_matrix_take(two_questions):
+    matrix = OptionMatrix.from_answers(two_questions)
+    positions = np.random.default_rng(2).choice(len(two_questions), 120)
+    taken = matrix.take(positions)
+
+    options = naive_options(two_questions)
+    rows = [set() for _ in positions]
+    for row, col in zip(taken.rows, taken.cols):
+        rows[row].add(taken.options[col])
+    assert rows == [options[p] for p in positions]
+
+
+# =====================================================
+# ROW INDEX
+# =====================================================
+def test_row_index_positions(survey):
+    domain = survey[COLUMNS["domain"]]
+    index = RowIndex(domain)
+
+    assert index.answers() == sorted(domain.dropna().unique().tolist())
+    for answer in index.answers():
+        assert index.positions(answer).tolist() == np.flatnonzero(domain == answer).tolist()
+    assert len(index.positions("Not an answer")) == 0
+
+
+def test_row_index_over_several_columns(survey):
+    columns = survey[[COLUMNS["membership"], COLUMNS["domain"]]]
+    index = RowIndex(columns)
+    mask = columns.isin(["Yes", "Space"]).any(axis=1).to_numpy()
+
+    bits = np.unpackbits(index.select(["Yes", "Space"]), count=len(columns))
+    assert np.flatnonzero(bits).tolist() == np.flatnonzero(mask).tolist()
+
+
+def test_row_index_without_bitmaps():
+    answers = pd.Series([f"answer {i % 200}" for i in range(1000)], dtype="category")
+    index = RowIndex(answers)
+    assert index.bitmaps is None and len(index.categories) > BITMAP_MAX_ANSWERS
+
+    selected = ["answer 3", "answer 150", "missing"]
+    bits = np.unpackbits(index.select(selected), count=len(answers))
+    assert bits.astype(bool).tolist() == answers.isin(selected).tolist()
+    assert not np.unpackbits(index.select([]), count=len(answers)).any()
+
+
+@pytest.mark.parametrize("selections", [
+    {},
+    {"domain": []},
+    {"domain": ["Space"]},
+    {"domain": ["Space", "Rail"]},
+    {"domain": ["Defence"], "membership": ["Yes", "Exploring"]},
+    {"domain": ["Healthcare", "Unknown"], "membership": ["No"], "respondent": ["3", "7", "42"]},
+    {"membership": ["Unknown"]},
+])
+def test_filter_rows_matches_masks(survey, roles, selections):
+    # 500 respondent IDs: more answers than BITMAP_MAX_ANSWERS.
+    indexes = row_indexes(survey, roles, {})
+    rows = filter_rows(indexes, selections)
+
+    if not any(selections.values()):
+        assert rows is None
+    else:
+        assert rows.tolist() == np.flatnonzero(naive_mask(survey, roles, selections)).tolist()
+
+
+# =====================================================
+# COUNT CUBE
+# =====================================================
+def test_count_cube_counts(survey, roles):
+    options = multi_select_options(survey, roles)
+    assert set(options) == {"confidence", "expectation"}
+
+    cube = CountCube(survey, roles, options)
+    assert cube.counts() == response_counts(survey, roles, options)
+
+
+@pytest.mark.parametrize("selections", [
+    {},
+    {"domain": ["Space"]},
+    {"membership": ["Yes", "Will decide later"]},
+    {"domain": ["Defence", "Rail"], "membership": ["Exploring"]},
+    {"domain": ["Unknown"]},
+])
+def test_count_cube_slice(survey, roles, selections):
+    cube = CountCube(survey, roles, multi_select_options(survey, roles))
+    subset = survey[naive_mask(survey, roles, selections)]
+
+    assert cube.slice(selections).counts() == response_counts(subset, roles)
+
+
+def test_count_cube_merge(roles):
+    first = make_survey(300, seed=3)
+    second = make_survey(200, seed=4, start=300)
+    # Answers the first export never gave.
+    second.loc[::7, COLUMNS["domain"]] = "Maritime"
+    second.loc[::5, COLUMNS["expectation"]] = "Podcasts; Events"
+    first, second = encode_categoricals(first), encode_categoricals(second)
+
+    cubes = [CountCube(df, roles, multi_select_options(df, roles)) for df in (first, second)]
+    merged = cubes[0].merge(cubes[1])
+
+    assert merged.counts() == add_counts(
+        response_counts(first, roles), response_counts(second, roles)
+    )
+    selections = {"domain": ["Maritime", "Space"]}
+    assert merged.slice(selections).counts() == add_counts(
+        response_counts(first[naive_mask(first, roles, selections)], roles),
+        response_counts(second[naive_mask(second, roles, selections)], roles),
+    )
+
+
+# =====================================================
+# COMPUTATION GRAPH
+# =====================================================
+@pytest.fixture
+def calls():
+    return []
+
+
+def _graph(calls, memo, cache, rows, wanted):
+    def traced(name, compute):
+        def run(*args):
+            calls.append(name)
+            return compute(*args)
+        return run
+
+    graph = ComputeGraph(cache, memo)
+    graph.set("rows", rows, tuple(rows))
+    graph.set("wanted", wanted, wanted)
+    graph.add("total", traced("total", sum), ["rows"])
+    graph.add("largest", traced("largest", max), ["rows"])
+
+    def summary(wanted, total, largest):
+        return total() if wanted() == "total" else largest()
+
+    graph.add("summary", traced("summary", summary), ["wanted", "total", "largest"], lazy=True)
+    graph.add("count", traced("count", len), ["rows"], shared=True)
+    return graph
+
+
+def test_compute_graph_pulls_lazy_inputs_on_demand(calls):
+    graph = _graph(calls, {}, ParseCache(), [3, 1, 2], "total")
+
+    assert graph.get("summary") == 6
+    assert calls == ["summary", "total"]
+
+
+def test_compute_graph_memoizes_across_reruns(calls):
+    memo = {}
+    cache = ParseCache()
+    _graph(calls, memo, cache, [3, 1, 2], "total").get("summary")
+
+    graph = _graph(calls, memo, cache, [3, 1, 2], "total")
+    assert graph.get("summary") == 6
+    assert graph.timings == {"summary": None}
+    assert calls == ["summary", "total"]
+
+    # Only the input that changed and what depends on it are evaluated.
+    graph = _graph(calls, memo, cache, [3, 1, 2], "largest")
+    assert graph.get("summary") == 3
+    assert calls[2:] == ["summary", "largest"]
+    assert graph.get("total") == 6 and calls[4:] == []
+
+    graph = _graph(calls, memo, cache, [5, 4], "largest")
+    assert graph.get("summary") == 5
+    assert calls[4:] == ["summary", "largest"]
+
+
+def test_compute_graph_shares_nodes_through_the_cache(calls):
+    cache = ParseCache()
+    sessions = [_graph(calls, {}, cache, [3, 1, 2], "total") for _ in range(2)]
+
+    assert [graph.get("count") for graph in sessions] == [3, 3]
+    assert calls == ["count"]
+    assert sessions[1].timings == {"count": None}
+    assert cache.stats()["parses"] == 1 and cache.stats()["hits"] == 1
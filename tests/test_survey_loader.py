@@ -0,0 +1,597 @@
+import gzip
+import os
+import runpy
+import threading
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import openpyxl
+import pandas as pd
+import pytest
+
+import survey_loader
+from conftest import COLUMNS, make_survey
+from survey_analysis import response_counts
+from survey_loader import ParseCache, ResponseDataset, encode_categoricals
+
+
+# =====================================================
+# ARCHIVES
+# =====================================================
+@pytest.fixture
+def archive(tmp_path):
+    path = tmp_path / "surveys.zip"
+    with zipfile.ZipFile(path, "w") as z:
+        z.writestr("north/", "")
+        z.writestr("north/responses.csv", make_survey(30).to_csv(index=False))
+        z.writestr("south/responses.csv", make_survey(40, seed=1).to_csv(index=False))
+        z.writestr("__MACOSX/north/._responses.csv", "")
+        z.writestr("notes.txt", "not a survey")
+    return path
+
+
+def test_archive_members_keep_their_folders(archive):
+    assert survey_loader.archive_members(str(archive), "surveys.zip") == [
+        ("north/responses.csv", "north/responses.csv"),
+        ("south/responses.csv", "south/responses.csv"),
+    ]
+    assert survey_loader.label_waves(["north/responses.csv", "south/responses.csv"]) == [
+        "north/responses", "south/responses",
+    ]
+    assert survey_loader.label_waves(["responses.csv", "responses.csv"]) == [
+        "responses", "responses (2)",
+    ]
+
+
+def test_archive_members_of_gz_and_empty_archives(tmp_path):
+    assert survey_loader.archive_members(None, "exports/responses.csv.gz") == [
+        (None, "responses.csv"),
+    ]
+    with pytest.raises(ValueError):
+        survey_loader.archive_members(None, "responses.txt.gz")
+
+    empty = tmp_path / "empty.zip"
+    with zipfile.ZipFile(empty, "w") as z:
+        z.writestr("notes.txt", "not a survey")
+    with pytest.raises(ValueError, match="no survey files"):
+        survey_loader.archive_members(str(empty), "empty.zip")
+
+
+def test_archive_members_parse_like_plain_files(archive, tmp_path):
+    plain = tmp_path / "responses.csv"
+    make_survey(40, seed=1).to_csv(plain, index=False)
+    packed = tmp_path / "responses.csv.gz"
+    with gzip.open(packed, "wb") as f:
+        f.write(plain.read_bytes())
+    expected = survey_loader.parse_text_roles(str(plain), "csv")
+
+    for member in [
+        survey_loader.ArchiveMember(str(archive), "south/responses.csv"),
+        survey_loader.ArchiveMember(str(packed)),
+    ]:
+        pd.testing.assert_frame_equal(survey_loader.parse_text_roles(member, "csv"), expected)
+
+    north = survey_loader.ArchiveMember(str(archive), "north/responses.csv")
+    assert len(survey_loader.parse_text_roles(north, "csv")) == 30
+
+
+# =====================================================
+# COLUMN ROLES
+# =====================================================
+@pytest.fixture
+def roles_cache(monkeypatch):
+    cache = ParseCache()
+    monkeypatch.setattr(survey_loader, "ROLES_CACHE", cache)
+    return cache
+
+
+# Several headers mention each role; none matches the schema profile.
+REWORDED = [
+    "Submitted at",
+    "Response ID",
+    "Comments on your domain",
+    "Did the INCOSE membership fee put you off?",
+    "Membership status",
+    "What would help you decide?",
+    "What do you expect from INCOSE?",
+    "Domain",
+]
+
+
+@pytest.mark.parametrize("columns", [REWORDED, REWORDED[::-1]])
+def test_roles_take_the_header_they_cover_most(roles_cache, columns):
+    assert survey_loader.resolve_roles(columns) == {
+        "membership": "Membership status",
+        "confidence": "What would help you decide?",
+        "expectation": "What do you expect from INCOSE?",
+        "domain": "Domain",
+        "respondent": "Response ID",
+        "timestamp": "Submitted at",
+    }
+
+
+def test_each_column_serves_one_role(roles_cache):
+    # "domain" alone would score this column above "industry sector".
+    roles = survey_loader.resolve_roles(["Industry sector", "Decision domain"])
+    assert roles["confidence"] == "Decision domain"
+    assert roles["domain"] == "Industry sector"
+
+
+def test_roles_are_cached_by_header_fingerprint(roles_cache):
+    roles = survey_loader.detect_roles(REWORDED)
+    roles["domain"] = None
+
+    assert survey_loader.detect_roles(REWORDED)["domain"] == "Domain"
+    assert roles_cache.stats()["parses"] == 1 and roles_cache.stats()["hits"] == 1
+
+
+@pytest.mark.parametrize("header", [
+    "What would be valuable in 2026? [Events]",
+    "What would be valuable in 2026? (Mentoring)",
+    "What would be valuable in 2026? - Certification",
+    "What would be valuable in 2026?.1",
+    "What would  be valuable in 2026?",
+])
+def test_question_stem(header):
+    assert survey_loader.question_stem(header) == "what would be valuable in 2026?"
+
+
+def test_multi_column_roles_fold_in_the_same_question(roles_cache):
+    columns = [
+        "Respondent ID",
+        "Are you an INCOSE member?",
+        "What would help you decide? [Cost]",
+        "Have you decided to attend the 2026 conference?",
+        "What would help you decide? [Employer support]",
+        "What would be valuable in 2026? (Events)",
+        "What would be valuable in 2026? - Mentoring",
+        "What would be valuable in 2026?.1",
+        "Domain",
+    ]
+    role_columns = survey_loader.detect_role_columns(columns)
+
+    assert role_columns["confidence"] == [
+        "What would help you decide? [Cost]",
+        "What would help you decide? [Employer support]",
+    ]
+    # Best match first, then the other columns in order.
+    assert role_columns["expectation"] == [
+        "What would be valuable in 2026?.1",
+        "What would be valuable in 2026? (Events)",
+        "What would be valuable in 2026? - Mentoring",
+    ]
+    assert role_columns["domain"] == ["Domain"]
+
+
+def test_profile_columns_are_not_folded(roles_cache):
+    columns = list(COLUMNS.values()) + ["What would be valuable in 2026?.1"]
+    role_columns = survey_loader.detect_role_columns(columns)
+
+    assert role_columns["expectation"] == [COLUMNS["expectation"]]
+
+
+# =====================================================
+# STREAMED PARSING
+# =====================================================
+def wide_survey(n, seed=0):
+    """
+    A survey export with untidy headers and columns no role uses.
+    """
+    survey = make_survey(n, seed=seed)
+    for i in range(10):
+        survey[f"Comment {i}"] = [f"note {j}" for j in range(n)]
+    return survey.rename(columns={COLUMNS["membership"]: "  Are you an   INCOSE member? "})
+
+
+def _role_frame(df, columns):
+    # Compare answers as text: the full parse leaves numbers-as-text typed.
+    return df[columns].astype(str).reset_index(drop=True)
+
+
+def test_streamed_workbook_matches_the_full_parse(tmp_path, monkeypatch):
+    monkeypatch.setattr(survey_loader, "PROGRESS_EVERY", 10)
+    path = tmp_path / "survey.xlsx"
+    wide_survey(45).to_excel(path, index=False)
+    workbook = openpyxl.load_workbook(path)
+    # Formatted but empty rows below the data, as spreadsheets often have.
+    for row in range(47, 52):
+        workbook.active.cell(row=row, column=1).font = openpyxl.styles.Font(bold=True)
+    workbook.save(path)
+
+    read = []
+    streamed = survey_loader.parse_workbook_roles(str(path), "openpyxl", progress=read.append)
+    full = survey_loader.parse_workbook(str(path))
+
+    assert sorted(streamed.columns) == sorted(COLUMNS.values())
+    pd.testing.assert_frame_equal(
+        _role_frame(streamed, list(streamed.columns)), _role_frame(full, list(streamed.columns))
+    )
+    assert read == [10, 20, 30, 40, 50]
+
+
+@pytest.mark.parametrize("fmt", ["csv", "tsv", "jsonl"])
+def test_chunked_text_matches_the_full_parse(tmp_path, monkeypatch, fmt):
+    monkeypatch.setattr(survey_loader, "CHUNK_ROWS", 7)
+    survey = wide_survey(45)
+    # Answers the first chunks never gave.
+    survey.loc[30:, COLUMNS["domain"]] = "Maritime"
+    path = tmp_path / f"survey.{fmt}"
+    if fmt == "jsonl":
+        survey.to_json(path, orient="records", lines=True)
+    else:
+        survey.to_csv(path, sep="\t" if fmt == "tsv" else ",", index=False)
+
+    read = []
+    chunked = survey_loader.parse_text_roles(str(path), fmt, progress=read.append)
+    full = survey_loader.parse_text(str(path), fmt)
+
+    assert sorted(chunked.columns) == sorted(COLUMNS.values())
+    pd.testing.assert_frame_equal(
+        _role_frame(chunked, list(chunked.columns)), _role_frame(full, list(chunked.columns))
+    )
+    assert "Maritime" in chunked[COLUMNS["domain"]].cat.categories
+    assert read == [7, 14, 21, 28, 35, 42, 45]
+
+
+# =====================================================
+# PARALLEL LOADING
+# =====================================================
+DASHBOARD = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "incose_decision_dashboard.py",
+)
+
+
+def test_workers_do_not_draw_the_dashboard(monkeypatch):
+    import streamlit
+
+    def draw(*args, **kwargs):
+        raise AssertionError("the page was drawn")
+
+    monkeypatch.setattr(streamlit, "set_page_config", draw)
+    # What a new worker process does with the Streamlit script.
+    namespace = runpy.run_path(DASHBOARD, run_name="__mp_main__")
+    assert callable(namespace["main"])
+
+
+@pytest.fixture
+def fresh_pool(monkeypatch):
+    monkeypatch.setattr(survey_loader, "_process_pool", None)
+    monkeypatch.setattr(survey_loader, "PARSE_WORKERS", 1)
+    yield
+    if survey_loader._process_pool is not None:
+        survey_loader._process_pool.shutdown()
+
+
+def test_pool_is_replaced_after_a_worker_dies(fresh_pool):
+    crashed = survey_loader.submit_to_pool(os._exit, 1)
+    with pytest.raises(BrokenProcessPool):
+        crashed.result(timeout=60)
+
+    assert survey_loader.submit_to_pool(survey_loader.question_stem, "Q [x]").result(60) == "q"
+
+
+def test_progress_manager_starts_like_the_workers(monkeypatch):
+    contexts = []
+
+    def worker_context():
+        contexts.append(real_context())
+        return contexts[-1]
+
+    real_context = survey_loader.worker_context
+    monkeypatch.setattr(survey_loader, "worker_context", worker_context)
+    monkeypatch.setattr(survey_loader, "_progress_manager", None)
+    try:
+        reporter = survey_loader.ProgressReporter(survey_loader._shared_progress(), "load")
+        reporter(10)
+        reporter.child("sheet")(5)
+        assert reporter.total() == 15
+        assert len(contexts) == 1 and contexts[0].get_start_method() != "fork"
+    finally:
+        survey_loader._progress_manager.shutdown()
+
+
+def test_load_job_previews_alongside_the_parse(tmp_path):
+    path = tmp_path / "survey.csv"
+    make_survey(200).to_csv(path, index=False)
+    workbook = tmp_path / "survey.xlsx"
+    make_survey(20).to_excel(workbook, index=False)
+    archive = tmp_path / "surveys.zip"
+    with zipfile.ZipFile(archive, "w") as z:
+        z.write(workbook, "north/survey.xlsx")
+
+    job = survey_loader.LoadJob([("preview csv", str(path), "survey.csv", None)])
+    (df, _), = job.result()
+    assert len(df) == 200 and len(job.preview) == survey_loader.PREVIEW_ROWS
+
+    member = survey_loader.ArchiveMember(str(archive), "north/survey.xlsx")
+    job = survey_loader.LoadJob([("preview zip", member, "north/survey.xlsx", None)])
+    (df, _), = job.result()
+    # A workbook in an archive is only inflated for the parse.
+    assert len(df) == 20 and job.preview is None
+
+
+# =====================================================
+# PARSE CACHE
+# =====================================================
+def test_parse_cache_single_flight():
+    cache = ParseCache(max_entries=4)
+    calls = []
+    release = threading.Event()
+
+    def parse(value):
+        calls.append(value)
+        release.wait(5)
+        return [value]
+
+    n_callers = 8
+    results = [None] * n_callers
+    barrier = threading.Barrier(n_callers)
+
+    def call(i):
+        barrier.wait()
+        results[i] = cache.get_or_parse("key", parse, "survey")
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(n_callers)]
+    for thread in threads:
+        thread.start()
+    # Let every caller reach the cache before the parse finishes.
+    deadline = time.monotonic() + 5
+    while cache.stats()["shared"] < n_callers - 1 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert calls == ["survey"]
+    assert all(result is results[0] for result in results)
+    assert cache.stats() == {"parses": 1, "hits": 0, "shared": n_callers - 1}
+
+    assert cache.get_or_parse("key", parse, "again") is results[0]
+    assert cache.get("key") is results[0]
+    assert "key" in cache
+    assert cache.stats()["hits"] == 2
+
+
+def test_parse_cache_shares_errors_then_retries():
+    cache = ParseCache()
+    started = threading.Event()
+    release = threading.Event()
+
+    def fail():
+        started.set()
+        release.wait(5)
+        raise ValueError("bad export")
+
+    errors = []
+
+    def call():
+        try:
+            cache.get_or_parse("key", fail)
+        except ValueError as e:
+            errors.append(e)
+
+    leader = threading.Thread(target=call)
+    leader.start()
+    started.wait(5)
+    follower = threading.Thread(target=call)
+    follower.start()
+    deadline = time.monotonic() + 5
+    while cache.stats()["shared"] < 1 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    release.set()
+    leader.join(5)
+    follower.join(5)
+
+    assert len(errors) == 2 and errors[0] is errors[1]
+    assert "key" not in cache
+    assert cache.get_or_parse("key", lambda: "parsed") == "parsed"
+
+
+def test_parse_cache_evicts_least_recently_used():
+    cache = ParseCache(max_entries=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+
+    assert "a" in cache and "c" in cache and "b" not in cache
+    assert cache.get("b") is None
+
+
+# =====================================================
+# SURVEY STORE
+# =====================================================
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(survey_loader, "CACHE_DIR", str(tmp_path))
+    # Parse in this process, so patched detection rules apply.
+    pool = ThreadPoolExecutor(max_workers=1)
+    monkeypatch.setattr(survey_loader, "process_pool", lambda: pool)
+    yield tmp_path
+    pool.shutdown()
+
+
+def test_stored_survey_is_parsed_again_after_a_synonym_edit(store, monkeypatch):
+    path = store / "sector.csv"
+    make_survey(50).rename(columns={COLUMNS["domain"]: "Sector"}).to_csv(path, index=False)
+    load = survey_loader.load_survey_roles
+
+    df, _ = load("key", str(path), "sector.csv")
+    assert "Sector" not in df.columns
+    assert survey_loader.is_stored("key")
+
+    groups = dict(survey_loader.ROLE_GROUPS)
+    groups["domain"] = groups["domain"] + [["sector"]]
+    monkeypatch.setattr(survey_loader, "ROLE_GROUPS", groups)
+    monkeypatch.setattr(survey_loader, "ROLE_RULES", survey_loader._role_rules_fingerprint())
+    monkeypatch.setattr(survey_loader, "ROLES_CACHE", ParseCache())
+    assert not survey_loader.is_stored("key")
+
+    # Without its source, the old copy is still better than nothing.
+    stale, info = load("key", None, "sector.csv")
+    assert info["engine"] == "arrow sidecar" and "Sector" not in stale.columns
+
+    df, info = load("key", str(path), "sector.csv")
+    assert info["engine"] != "arrow sidecar" and "Sector" in df.columns
+    assert survey_loader.is_stored("key")
+    df, info = load("key", None, "sector.csv")
+    assert info["engine"] == "arrow sidecar" and "Sector" in df.columns
+
+
+@pytest.mark.parametrize("engine", ["openpyxl", "calamine"])
+def test_workbook_roles_use_declared_answers(tmp_path, engine):
+    if engine not in survey_loader.available_engines():
+        pytest.skip(f"{engine} is not installed")
+    survey = make_survey(20)
+    survey[COLUMNS["membership"]] = ["Yes", "No"] * 10
+    path = tmp_path / "survey.xlsx"
+    survey.to_excel(path, index=False)
+
+    df = survey_loader.parse_workbook_roles(str(path), engine)
+
+    # The profile's vocabulary, not just the two answers given.
+    membership = df[COLUMNS["membership"]]
+    assert membership.cat.categories.tolist() == ["Exploring", "No", "Will decide later", "Yes"]
+    assert membership.astype(str).tolist() == survey[COLUMNS["membership"]].tolist()
+
+
+# =====================================================
+# WATCHED FOLDER
+# =====================================================
+def test_watcher_skips_files_that_fail(store, monkeypatch):
+    monkeypatch.setattr(survey_loader, "PARSE_CACHE", ParseCache())
+    # Scan by hand rather than from the polling thread.
+    monkeypatch.setattr(survey_loader.FolderWatcher, "_poll", lambda self: None)
+    folder = store / "watched"
+    folder.mkdir()
+    make_survey(30).to_csv(folder / "good.csv", index=False)
+    (folder / "bad.xlsx").write_bytes(b"not a workbook")
+    (folder / "broken.zip").write_bytes(b"not an archive")
+
+    watcher = survey_loader.FolderWatcher(str(folder))
+    watcher.scan()
+    assert [upload[2] for upload in watcher.uploads()] == ["good.csv"]
+    assert watcher.version == 1
+    assert sorted(message.split(":")[0] for message in watcher.errors) == [
+        "bad.xlsx", "broken.zip",
+    ]
+
+    def load_surveys(uploads, *args):
+        raise AssertionError(f"{uploads[0][2]} was parsed again")
+
+    # Failures are remembered, also after a restart, until the file changes.
+    real_load_surveys = survey_loader.load_surveys
+    monkeypatch.setattr(survey_loader, "load_surveys", load_surveys)
+    for watcher in [watcher, survey_loader.FolderWatcher(str(folder))]:
+        watcher.scan()
+        assert [upload[2] for upload in watcher.uploads()] == ["good.csv"]
+        assert len(watcher.errors) == 2
+
+    monkeypatch.setattr(survey_loader, "load_surveys", real_load_surveys)
+    make_survey(10, seed=1).to_excel(folder / "bad.xlsx", index=False)
+    watcher.scan()
+    assert [upload[2] for upload in watcher.uploads()] == ["bad.xlsx", "good.csv"]
+    assert [message.split(":")[0] for message in watcher.errors] == ["broken.zip"]
+
+
+# =====================================================
+# RESPONSE DATASET
+# =====================================================
+@pytest.fixture
+def dataset_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(survey_loader, "DATASET_DIR", str(tmp_path))
+    return tmp_path
+
+
+def _roles(df):
+    return {role: [col] for role, col in COLUMNS.items() if col in df.columns}
+
+
+def _check(dataset, expected_ids):
+    df = dataset.frame()
+    assert sorted(df[COLUMNS["respondent"]].astype(int)) == sorted(expected_ids)
+    assert dataset.rows == len(expected_ids)
+    assert dataset.counts == response_counts(df, _roles(df))
+    assert dataset.cube().counts() == dataset.counts
+
+
+def test_dataset_dedupes_by_respondent(dataset_dir):
+    export = make_survey(400)
+    dataset = ResponseDataset("by id")
+
+    assert dataset.append("week 1", encode_categoricals(export.iloc[:250])) == 250
+    dataset.cube()
+    # Week 2 repeats most of week 1, in a different order.
+    week2 = export.iloc[100:].sample(frac=1, random_state=0)
+    assert dataset.append("week 2", encode_categoricals(week2)) == 150
+    assert dataset.append("week 2", encode_categoricals(week2)) == 0
+    _check(dataset, range(400))
+
+    reopened = ResponseDataset("by id")
+    assert reopened.append("week 2 again", encode_categoricals(export)) == 0
+    _check(reopened, range(400))
+
+
+def test_dataset_dedupes_by_timestamp(dataset_dir):
+    export = make_survey(300).drop(columns=COLUMNS["respondent"])
+    export.insert(0, "Respondent Number", range(300))
+    dataset = ResponseDataset("by timestamp")
+
+    dataset.append("first", encode_categoricals(export.iloc[:120]))
+    assert dataset.append("second", encode_categoricals(export.iloc[60:])) == 180
+    assert dataset.frame()["Respondent Number"].astype(int).tolist() == list(range(300))
+
+
+def test_dataset_dedupes_by_position(dataset_dir):
+    export = make_survey(300).drop(columns=[COLUMNS["respondent"], COLUMNS["timestamp"]])
+    dataset = ResponseDataset("by position")
+
+    dataset.append("first", encode_categoricals(export.iloc[:200]))
+    assert dataset.append("second", encode_categoricals(export)) == 100
+    assert dataset.rows == 300
+    assert dataset.counts == response_counts(export.pipe(encode_categoricals), _roles(export))
+
+
+def test_dataset_append_reads_no_stored_parts(dataset_dir, monkeypatch):
+    export = make_survey(300)
+    ResponseDataset("no rereads").append("first", encode_categoricals(export.iloc[:200]))
+
+    def read_table(*args, **kwargs):
+        raise AssertionError("stored parts were read")
+
+    reopened = ResponseDataset("no rereads")
+    monkeypatch.setattr(survey_loader.feather, "read_table", read_table)
+    assert reopened.append("second", encode_categoricals(export.iloc[150:])) == 100
+
+
+def test_dataset_records_ids_of_older_datasets(dataset_dir):
+    export = make_survey(300)
+    dataset = ResponseDataset("older")
+    dataset.append("first", encode_categoricals(export.iloc[:200]))
+    ids_file = dataset_dir / os.path.basename(dataset.directory) / "ids.jsonl"
+    ids_file.unlink()
+
+    reopened = ResponseDataset("older")
+    assert reopened.append("second", encode_categoricals(export)) == 100
+    assert ids_file.exists()
+    _check(reopened, range(300))
+
+
+def test_datasets_are_evicted_least_recently_used_first(dataset_dir, monkeypatch):
+    monkeypatch.setattr(survey_loader, "_datasets", {})
+    old = survey_loader.response_dataset("old")
+    old.append("export", encode_categoricals(make_survey(200)))
+    os.utime(os.path.join(old.directory, "dataset.json"), (0, 0))
+    survey_loader.response_dataset("new")
+    size = sum(size for _, size, _ in survey_loader._dataset_entries())
+    monkeypatch.setattr(survey_loader, "DATASET_BUDGET_MB", size / 1024 / 1024)
+
+    new = survey_loader.response_dataset("new")
+    new.append("export", encode_categoricals(make_survey(200, seed=1)))
+
+    assert not os.path.exists(old.directory)
+    assert old.rows == 0 and old.frame().empty
+    assert new.rows == 200